@@ -0,0 +1,58 @@
+"""Authenticated admin endpoints for production diagnostics."""
+
+import asyncio
+import logging
+import secrets
+from typing import Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.constants import PROFILE_DEFAULT_INTERVAL_MS, PROFILE_MAX_SECONDS
+from app.services.load import load_monitor
+from app.services.profiling import loop_blocking_detector, sampling_profiler
+
+logger = logging.getLogger(__name__)
+
+
+async def require_admin(authorization: str | None = Header(default=None)) -> None:
+    """Check the admin bearer token; admin endpoints are off without one."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not found")
+    expected = f"Bearer {settings.admin_token}"
+    if authorization is None or not secrets.compare_digest(authorization, expected):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(default=10.0, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(default=PROFILE_DEFAULT_INTERVAL_MS, ge=1, le=1000),
+) -> str:
+    """
+    Run a time-boxed sampling profile across live requests.
+
+    Returns folded stacks that flamegraph.pl or speedscope render directly.
+    """
+    if sampling_profiler.running:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    logger.info(f"Profiling for {seconds}s every {interval_ms}ms")
+    try:
+        return await asyncio.to_thread(sampling_profiler.profile, seconds, interval_ms)
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+
+@router.get("/stalls")
+async def stalls() -> dict[str, Any]:
+    """Return current loop lag and recent event-loop stalls with their stacks."""
+    return {
+        "loop_lag_ms": round(load_monitor.loop_lag_ms, 1),
+        "threshold_ms": loop_blocking_detector.threshold_ms,
+        "stalls": loop_blocking_detector.recent_stalls(),
+    }
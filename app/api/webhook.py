@@ -3,15 +3,35 @@
 import logging
 
 import httpx
-from fastapi import APIRouter, Request, Response, Query, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Header, Request, Response, Query, HTTPException
 
 from app.core.config import settings
 from app.core.constants import (
-    WHATSAPP_API_BASE_URL,
-    WHATSAPP_API_VERSION,
     WHATSAPP_MESSAGING_PRODUCT,
+    BUSY_MESSAGE,
+    PREFERENCES_SAVED_MESSAGE,
+    SHARD_INTERNAL_WEBHOOK_PATH,
+    SHARD_SECRET_HEADER,
 )
+from app.services.capture import traffic_recorder
 from app.services.llm import llm_service
+from app.services.load import (
+    ADMIT,
+    SHED_BUSY_REPLY,
+    SHED_DEFER,
+    admission_controller,
+    load_monitor,
+)
+from app.services.output_budget import detect_request_type
+from app.services.plan_store import plan_store
+from app.services.precompute import (
+    is_weekly_plan_request,
+    meal_plan_precomputer,
+    parse_preferences_command,
+)
+from app.services.recipes import recipe_library
+from app.services.sharding import shard_router
+from app.services.tenants import current_tenant, tenant_registry
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -49,22 +69,9 @@ async def receive_webhook(request: Request) -> dict[str, str]:
     try:
         body = await request.json()
         logger.info(f"Received webhook: {body}")
+        traffic_recorder.record_webhook(body)
 
-        # Extract message data
-        if body.get("object") == "whatsapp_business_account":
-            for entry in body.get("entry", []):
-                for change in entry.get("changes", []):
-                    value = change.get("value", {})
-
-                    # Handle incoming messages
-                    if "messages" in value:
-                        for message in value["messages"]:
-                            await handle_incoming_message(message, value)
-
-                    # Handle status updates (delivered, read, etc.)
-                    if "statuses" in value:
-                        logger.info(f"Status update: {value['statuses']}")
-
+        await process_webhook_body(body, route=True)
         return {"status": "ok"}
 
     except Exception as e:
@@ -72,6 +79,85 @@ async def receive_webhook(request: Request) -> dict[str, str]:
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.post(SHARD_INTERNAL_WEBHOOK_PATH, include_in_schema=False)
+async def receive_forwarded_webhook(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    shard_secret: str | None = Header(default=None, alias=SHARD_SECRET_HEADER),
+) -> dict[str, str]:
+    """
+    Receive a message forwarded by another shard.
+
+    The sending node has already routed it here, so it is processed locally,
+    after acknowledging so the sender's forward does not wait on the LLM.
+    """
+    if not shard_router.check_secret(shard_secret):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+    body = await request.json()
+    background_tasks.add_task(process_webhook_body, body, False)
+    return {"status": "ok"}
+
+
+async def process_webhook_body(body: dict, route: bool) -> None:
+    """
+    Dispatch the messages and statuses of a webhook body.
+
+    Args:
+        body: Webhook payload
+        route: Whether to forward messages owned by another shard
+    """
+    if body.get("object") != "whatsapp_business_account":
+        return
+
+    for entry in body.get("entry", []):
+        for change in entry.get("changes", []):
+            value = change.get("value", {})
+
+            # Handle incoming messages, as the business number they were sent to
+            if "messages" in value:
+                token = current_tenant.set(tenant_registry.resolve(value))
+                try:
+                    for message in value["messages"]:
+                        if route and await shard_router.route(message, value):
+                            continue
+                        await admit_message(message, value)
+                finally:
+                    current_tenant.reset(token)
+
+            # Handle status updates (delivered, read, etc.)
+            if "statuses" in value:
+                logger.info(f"Status update: {value['statuses']}")
+
+
+async def admit_message(message: dict, value: dict) -> None:
+    """
+    Process a message, or shed it when the process is overloaded.
+
+    Args:
+        message: Message data from webhook
+        value: Full value object containing metadata
+    """
+    from_number = message.get("from", "")
+
+    async def process() -> None:
+        async with shard_router.sender_lock(from_number):
+            with load_monitor.track_message():
+                await handle_incoming_message(message, value)
+
+    decision = admission_controller.decide()
+    if decision == ADMIT:
+        await process()
+    elif decision == SHED_DEFER:
+        logger.warning(f"Overloaded, deferring message {message.get('id')}")
+        admission_controller.defer(process)
+    elif decision == SHED_BUSY_REPLY:
+        logger.warning(f"Overloaded, sending busy reply for message {message.get('id')}")
+        await send_text_message(from_number, BUSY_MESSAGE)
+    else:
+        logger.warning(f"Overloaded, acknowledging message {message.get('id')} without processing")
+
+
 async def handle_incoming_message(message: dict, value: dict) -> None:
     """
     Process incoming WhatsApp message.
@@ -91,9 +177,31 @@ async def handle_incoming_message(message: dict, value: dict) -> None:
         text_body = message.get("text", {}).get("body", "")
         logger.info(f"Text message: {text_body}")
 
+        preferences = parse_preferences_command(text_body)
+        if preferences is not None:
+            plan_store.set_preferences(from_number, preferences)
+            await send_text_message(from_number, PREFERENCES_SAVED_MESSAGE)
+            return
+
         try:
-            # Send to LLM for processing
-            ai_response = await llm_service.generate_meal_plan_response(text_body)
+            # Saved recipes are answered from the library without the LLM
+            library_reply = recipe_library.answer(from_number, text_body)
+            if library_reply is not None:
+                await send_text_message(from_number, library_reply)
+                return
+
+            # Weekly plans are precomputed or streamed day by day
+            context = recipe_library.grounding_context(from_number, text_body)
+            if is_weekly_plan_request(text_body):
+                async for part in meal_plan_precomputer.stream_weekly_plan(
+                    from_number, text_body, context=context
+                ):
+                    await send_text_message(from_number, part)
+                return
+
+            ai_response = await llm_service.generate_meal_plan_response(text_body, context=context)
+            if detect_request_type(text_body) == "recipe":
+                recipe_library.save_generated(from_number, ai_response)
             logger.debug(f"AI Response: {ai_response}")
             await send_text_message(from_number, ai_response)
         except Exception as e:
@@ -117,18 +225,13 @@ async def handle_incoming_message(message: dict, value: dict) -> None:
 
 async def send_text_message(to_number: str, text: str) -> None:
     """
-    Send a text message via WhatsApp Cloud API.
+    Send a text message via WhatsApp Cloud API, from the current tenant's number.
 
     Args:
         to_number: Recipient phone number
         text: Message text
     """
-    url = f"{WHATSAPP_API_BASE_URL}/{WHATSAPP_API_VERSION}/{settings.whatsapp_phone_number_id}/messages"
-
-    headers = {
-        "Authorization": f"Bearer {settings.whatsapp_access_token}",
-        "Content-Type": "application/json",
-    }
+    tenant = tenant_registry.current()
 
     payload = {
         "messaging_product": WHATSAPP_MESSAGING_PRODUCT,
@@ -137,10 +240,10 @@ async def send_text_message(to_number: str, text: str) -> None:
         "text": {"body": text},
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            logger.info(f"Message sent to {to_number}: {text[:50]}...")
-        except httpx.HTTPError as e:
-            logger.error(f"Failed to send message: {e}", exc_info=True)
+    try:
+        await tenant.send_budget.acquire()
+        response = await tenant.client.post("/messages", json=payload)
+        response.raise_for_status()
+        logger.info(f"Message sent to {to_number} from {tenant.key}: {text[:50]}...")
+    except httpx.HTTPError as e:
+        logger.error(f"Failed to send message: {e}", exc_info=True)
@@ -12,6 +12,84 @@ DEFAULT_LLM_TEMPERATURE = 0.7
 DEFAULT_LLM_MAX_TOKENS = 1024
 DEFAULT_LLM_REASONING = False
 
+# Output budgeting
+LLM_CHARS_PER_TOKEN = 4
+LLM_MIN_MAX_TOKENS = 64
+LLM_MAX_TOKENS_BY_REQUEST_TYPE = {
+    "chat": 256,
+    "recipe": 768,
+    "shopping_list": 768,
+    "meal_plan": 1024,
+}
+LLM_RESPONSE_STYLE_BY_REQUEST_TYPE = {
+    "chat": "Answer in one or two short sentences.",
+    "recipe": "Give the ingredient list and short numbered steps, nothing else.",
+    "shopping_list": "Reply with a bulleted list grouped by aisle, no commentary.",
+    "meal_plan": "Use one line per meal with the dish name only, no recipes unless asked.",
+}
+REQUEST_TYPE_KEYWORDS = {
+    "shopping_list": [
+        "shopping",
+        "grocery",
+        "groceries",
+        "liste de courses",
+        "liste des courses",
+        "faire les courses",
+    ],
+    "meal_plan": ["meal plan", "plan", "week", "menu", "semaine"],
+    "recipe": ["recipe", "recette", "ingredients", "ingrédients", "how do i cook", "how to cook"],
+}
+LLM_BUDGET_SAMPLE_SIZE = 200
+LLM_BUDGET_MIN_SAMPLES = 20
+LLM_BUDGET_PERCENTILE = 0.95
+LLM_BUDGET_HEADROOM = 1.2
+LLM_MAX_CONTINUATIONS = 2
+LLM_CONTINUATION_MAX_TOKENS = 256
+LLM_CONTINUATION_PROMPT = "Continue exactly where you stopped. Do not repeat anything."
+
+# Sharding
+SHARD_VIRTUAL_NODES = 128
+SHARD_PROBE_INTERVAL_SECONDS = 10
+SHARD_FORWARD_TIMEOUT_SECONDS = 5.0
+SHARD_SECRET_HEADER = "X-Botatouille-Shard-Secret"
+SHARD_INTERNAL_WEBHOOK_PATH = "/internal/webhook"
+
+# Load monitoring and shedding
+LOAD_LAG_PROBE_INTERVAL_SECONDS = 0.5
+LOAD_MAX_LOOP_LAG_MS = 200.0
+LOAD_MAX_IN_FLIGHT_LLM = 32
+LOAD_MAX_QUEUED_LLM = 32
+LOAD_MAX_IN_FLIGHT_MESSAGES = 64
+LOAD_MAX_UPSTREAM_ERROR_RATE = 0.5
+LOAD_ERROR_WINDOW_SECONDS = 60.0
+LOAD_ERROR_MIN_SAMPLES = 10
+LOAD_CRITICAL_FACTOR = 2.0
+LOAD_MAX_DEFERRED = 100
+LOAD_DEFER_MAX_WAIT_SECONDS = 60.0
+LOAD_DEFER_POLL_SECONDS = 0.5
+BUSY_MESSAGE = "I'm a bit busy right now 🙏 Please try again in a minute."
+
+# Event-loop blocking detection and profiling
+LOOP_HEARTBEAT_SECONDS = 0.05
+LOOP_BLOCK_THRESHOLD_MS = 250.0
+LOOP_STALL_HISTORY = 20
+PROFILE_MAX_SECONDS = 60.0
+PROFILE_DEFAULT_INTERVAL_MS = 5.0
+
+# Multi-number tenancy
+TENANT_DEFAULT_WEIGHT = 1.0
+TENANT_DEFAULT_SEND_PER_SECOND = 20.0
+TENANT_DEFAULT_LLM_REQUESTS_PER_MINUTE = 60
+TENANT_MAX_CONNECTIONS = 10
+TENANT_SEND_TIMEOUT_SECONDS = 10.0
+LLM_SCHEDULER_CONCURRENCY = LOAD_MAX_IN_FLIGHT_LLM
+
+# Model benchmark
+BENCHMARK_CORPUS_PATH = "benchmarks/corpus.jsonl"
+BENCHMARK_RECORDING_PATH = "benchmarks/recorded.jsonl"
+BENCHMARK_STREAM_CHUNKS = 8
+BENCHMARK_LLM_REQUESTS_PER_MINUTE = 6000
+
 # Message limits
 WHATSAPP_MAX_MESSAGE_LENGTH = 4096
 
@@ -19,6 +97,62 @@ WHATSAPP_MAX_MESSAGE_LENGTH = 4096
 DEFAULT_MEAL_PLAN_DAYS = 7
 MEAL_TYPES = ["lunch", "dinner"]
 DAYS_OF_WEEK = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MEAL_PLAN_TOKENS_PER_DAY = 80
+MEAL_PLAN_TOKENS_OVERHEAD = 64
+MEAL_PLAN_JSON_INSTRUCTION = (
+    "Reply only with JSON matching the meal_plan schema: one object per day in order, "
+    "with the day name and a short dish name for each meal."
+)
+MEAL_PLAN_REPAIR_INSTRUCTION = "Only return these days: {days}."
+MEAL_EMOJIS = {"lunch": "🥗", "dinner": "🍽️"}
+WEEKLY_PLAN_KEYWORDS = ["week", "weekly", "semaine"]
+PREFERENCES_COMMAND_PREFIXES = ["preferences:", "préférences:"]
+PREFERENCES_SAVED_MESSAGE = "Preferences saved! Your next weekly plan will follow them."
+WEEKLY_PLAN_PROMPT = "Plan my lunches and dinners for the week starting {week_start}."
+INCOMPLETE_PLAN_MESSAGE = "I couldn't plan {days} this time. Ask me again for a full week."
+
+# Off-peak precomputation (hours are UTC, weekdays are Monday=0, budget in completion tokens)
+PRECOMPUTE_WINDOW_START_HOUR = 2
+PRECOMPUTE_WINDOW_END_HOUR = 6
+PRECOMPUTE_WEEKDAYS = [4, 5, 6]
+PRECOMPUTE_ACTIVE_DAYS = 14
+PRECOMPUTE_MAX_CONCURRENCY = 4
+PRECOMPUTE_RUN_TOKEN_BUDGET = 200_000
+PRECOMPUTE_TICK_SECONDS = 300
+
+# Recipe library
+RECIPE_MINHASH_PERMUTATIONS = 64
+RECIPE_MINHASH_BANDS = 16
+RECIPE_SHINGLE_SIZE = 3
+RECIPE_DUPLICATE_THRESHOLD = 0.8
+RECIPE_SEARCH_LIMIT = 10
+RECIPE_GROUNDING_LIMIT = 3
+RECIPE_GROUNDING_MAX_CHARS = 600
+RECIPE_QUICK_PREP_MINUTES = 30
+SAVE_RECIPE_COMMAND_PREFIXES = ["save recipe:", "enregistrer recette:", "sauvegarder recette:"]
+RECIPE_DIET_KEYWORDS = {
+    "vegetarian": ["vegetarian", "veggie", "végétarien", "végétarienne"],
+    "vegan": ["vegan", "végan", "végane", "végétalien"],
+    "gluten_free": ["gluten-free", "gluten free", "sans gluten"],
+    "dairy_free": ["dairy-free", "dairy free", "sans lactose"],
+}
+RECIPE_UNITS = [
+    "g", "kg", "mg", "ml", "cl", "dl", "l", "tbsp", "tsp", "cup", "cups", "oz", "lb",
+    "pinch", "clove", "cloves", "can", "cans", "slice", "slices", "cs", "cc", "pincée",
+]
+RECIPE_STOPWORDS = [
+    "a", "an", "and", "the", "of", "for", "with", "my", "me", "show", "list", "find", "all",
+    "saved", "recipe", "recipes", "any", "some", "please", "what", "are", "do", "i", "have",
+    "give", "get", "to", "in", "under", "less", "than", "min", "minutes", "quick", "can", "you",
+    "le", "la", "les", "de", "des", "du", "mes", "ma", "mon", "moi", "montre", "recette",
+    "recettes", "avec", "pour", "en", "moins", "rapide", "rapides", "sauvegardées",
+    "browse", "see", "could", "affiche", "liste", "trouve", "cherche",
+]
+RECIPE_GROUNDING_PROMPT = (
+    "The user's saved recipes (reuse them rather than inventing new ones when relevant):\n{recipes}"
+)
+RECIPE_SAVED_MESSAGE = "Saved \"{title}\" to your recipes 📖"
+RECIPE_DUPLICATE_MESSAGE = "\"{title}\" is already in your recipes."
 
 # System prompt for LLM
 MEAL_PLANNING_SYSTEM_PROMPT = """You are Botatouille, a friendly meal planning assistant on WhatsApp.
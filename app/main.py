@@ -2,13 +2,21 @@
 
 import logging
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.admin import router as admin_router
 from app.api.webhook import router as webhook_router
 from app.core.config import settings
+from app.services.load import load_monitor
+from app.services.plan_store import plan_store
+from app.services.profiling import loop_blocking_detector
+from app.services.precompute import meal_plan_precomputer
+from app.services.recipes import recipe_library
+from app.services.sharding import shard_router
+from app.services.tenants import tenant_registry
 
 # Configure logging
 logging.basicConfig(
@@ -23,8 +31,19 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan manager."""
     logger.info("Starting Botatouille application")
     logger.info(f"Environment: {settings.environment}")
+    load_monitor.start()
+    loop_blocking_detector.start()
+    meal_plan_precomputer.start()
+    shard_router.start()
     yield
     logger.info("Shutting down Botatouille application")
+    await load_monitor.stop()
+    await loop_blocking_detector.stop()
+    await shard_router.stop()
+    await meal_plan_precomputer.stop()
+    await tenant_registry.close()
+    plan_store.close()
+    recipe_library.close()
 
 
 app = FastAPI(
@@ -45,6 +64,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(webhook_router, tags=["webhook"])
+app.include_router(admin_router, tags=["admin"])
 
 
 @app.get("/")
@@ -58,6 +78,16 @@ async def root() -> dict[str, str]:
 
 
 @app.get("/health")
+@app.get("/health/live")
 async def health() -> dict[str, str]:
-    """Health check endpoint."""
+    """Liveness check endpoint: the process is up and serving requests."""
     return {"status": "healthy"}
+
+
+@app.get("/health/ready")
+async def ready(response: Response) -> dict[str, Any]:
+    """Readiness check endpoint: 503 while the process is overloaded."""
+    readiness = load_monitor.readiness()
+    if not readiness["ready"]:
+        response.status_code = 503
+    return readiness
@@ -0,0 +1,26 @@
+"""LLM completion result models."""
+
+from pydantic import BaseModel
+
+
+class LLMUsage(BaseModel):
+    """Token usage reported by OpenRouter for a completion."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    reasoning_tokens: int = 0
+    cost: float | None = None
+
+
+class LLMCompletion(BaseModel):
+    """Chat completion content with its finish reason and usage."""
+
+    content: str
+    finish_reason: str | None = None
+    usage: LLMUsage = LLMUsage()
+
+    @property
+    def truncated(self) -> bool:
+        """Whether generation stopped because it hit max_tokens."""
+        return self.finish_reason == "length"
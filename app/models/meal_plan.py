@@ -0,0 +1,30 @@
+"""Structured meal plan models."""
+
+from pydantic import BaseModel
+
+from app.core.constants import MEAL_EMOJIS
+
+
+class DayPlan(BaseModel):
+    """Meals planned for one day."""
+
+    day: str
+    meals: dict[str, str]
+
+    def to_text(self) -> str:
+        """Format the day as a WhatsApp message."""
+        lines = [f"*{self.day.capitalize()}*"]
+        for meal_type, dish in self.meals.items():
+            emoji = MEAL_EMOJIS.get(meal_type, "•")
+            lines.append(f"{emoji} {meal_type.capitalize()}: {dish}")
+        return "\n".join(lines)
+
+
+class MealPlan(BaseModel):
+    """A multi-day meal plan."""
+
+    days: list[DayPlan]
+
+    def to_text(self) -> str:
+        """Format the whole plan as one WhatsApp message."""
+        return "\n\n".join(day.to_text() for day in self.days)
@@ -0,0 +1,24 @@
+"""Recipe library models."""
+
+from pydantic import BaseModel
+
+
+class Recipe(BaseModel):
+    """A recipe saved in a user's library."""
+
+    id: int | None = None
+    title: str
+    text: str
+    ingredients: list[str] = []
+    diets: list[str] = []
+    prep_minutes: int | None = None
+    source: str = "user"  # user or generated
+
+
+class RecipeQuery(BaseModel):
+    """Filters parsed from a recipe library request."""
+
+    terms: list[str] = []
+    ingredients: list[str] = []
+    diet: str | None = None
+    max_prep_minutes: int | None = None
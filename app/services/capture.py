@@ -0,0 +1,158 @@
+"""Opt-in capture of redacted webhook and LLM traffic to rotating JSONL files."""
+
+import hashlib
+import json
+import logging
+import re
+import secrets
+import time
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PHONE_KEYS = {"from", "wa_id", "to", "recipient_id", "display_phone_number"}
+NAME_KEYS = {"name"}
+PRESERVED_KEYS = {"id", "timestamp", "phone_number_id"}
+REDACTED = "[redacted]"
+
+_EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE_PATTERN = re.compile(r"\+?\d[\d .-]{6,}\d")
+
+# Pseudonyms stay consistent within a process so a user's messages remain linked
+_SALT = secrets.token_bytes(16)
+
+
+def pseudonymize(value: str) -> str:
+    """Replace an identifier with a stable, non-reversible pseudonym."""
+    digest = hashlib.sha256(_SALT + value.encode("utf-8")).hexdigest()
+    return f"user-{digest[:12]}"
+
+
+def scrub_text(text: str) -> str:
+    """Remove emails and phone-like numbers from free text."""
+    text = _EMAIL_PATTERN.sub(REDACTED, text)
+    return _PHONE_PATTERN.sub(REDACTED, text)
+
+
+def redact(data: Any) -> Any:
+    """
+    Recursively redact personal data from a webhook or LLM payload.
+
+    Phone numbers become pseudonyms, profile names are dropped and free
+    text is scrubbed of emails and phone numbers.
+    """
+    if isinstance(data, dict):
+        redacted = {}
+        for key, value in data.items():
+            if key in PRESERVED_KEYS:
+                redacted[key] = value
+            elif key in PHONE_KEYS and isinstance(value, str):
+                redacted[key] = pseudonymize(value)
+            elif key in NAME_KEYS and isinstance(value, str):
+                redacted[key] = REDACTED
+            else:
+                redacted[key] = redact(value)
+        return redacted
+    if isinstance(data, list):
+        return [redact(item) for item in data]
+    if isinstance(data, str):
+        return scrub_text(data)
+    return data
+
+
+class TrafficRecorder:
+    """Append capture records to a size-rotated JSONL file."""
+
+    def __init__(
+        self,
+        path: str | None = None,
+        max_bytes: int | None = None,
+        backup_count: int | None = None,
+    ) -> None:
+        """Initialize the recorder from settings unless overridden."""
+        self.path = Path(path or settings.capture_path)
+        self.max_bytes = max_bytes or settings.capture_max_bytes
+        self.backup_count = backup_count if backup_count is not None else settings.capture_backup_count
+
+    @property
+    def enabled(self) -> bool:
+        """Whether capture is switched on."""
+        return settings.capture_enabled
+
+    def _rotate(self) -> None:
+        """Shift traffic.jsonl -> traffic.jsonl.1 -> ... dropping the oldest."""
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                source.replace(self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backup_count > 0:
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+    def write(self, record: dict[str, Any]) -> None:
+        """Append one record, rotating the file when it grows too large."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+                self._rotate()
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Failed to write capture record: {e}", exc_info=True)
+
+    def record_webhook(self, body: dict[str, Any]) -> None:
+        """Capture an incoming webhook body."""
+        if not self.enabled:
+            return
+        self.write({"kind": "webhook", "ts": time.time(), "body": redact(body)})
+
+    def record_llm(
+        self,
+        request: dict[str, Any],
+        response: dict[str, Any],
+        duration_ms: float,
+    ) -> None:
+        """Capture an LLM request/response pair with its latency."""
+        if not self.enabled:
+            return
+        self.write(
+            {
+                "kind": "llm",
+                "ts": time.time(),
+                "duration_ms": round(duration_ms, 1),
+                "request": redact(request),
+                "response": redact(response),
+            }
+        )
+
+    def record_llm_error(
+        self,
+        request: dict[str, Any],
+        error: Exception,
+        duration_ms: float,
+    ) -> None:
+        """Capture a failed LLM request with its error, so failures can be replayed."""
+        if not self.enabled:
+            return
+        response = getattr(error, "response", None)
+        self.write(
+            {
+                "kind": "llm",
+                "ts": time.time(),
+                "duration_ms": round(duration_ms, 1),
+                "request": redact(request),
+                "error": {
+                    "type": type(error).__name__,
+                    "status": response.status_code if response is not None else None,
+                    "message": scrub_text(str(error)),
+                },
+            }
+        )
+
+
+# Global instance
+traffic_recorder = TrafficRecorder()
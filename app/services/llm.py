@@ -1,6 +1,11 @@
 """OpenRouter LLM service for conversational AI."""
 
+import asyncio
+import json
 import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable
 
 import httpx
 
@@ -10,9 +15,31 @@ from app.core.constants import (
     DEFAULT_LLM_MODEL,
     DEFAULT_LLM_TEMPERATURE,
     MEAL_PLANNING_SYSTEM_PROMPT,
+    RECIPE_GROUNDING_PROMPT,
     OPENROUTER_API_BASE_URL,
-    DEFAULT_LLM_REASONING
+    DEFAULT_LLM_REASONING,
+    DAYS_OF_WEEK,
+    MEAL_PLAN_JSON_INSTRUCTION,
+    MEAL_PLAN_REPAIR_INSTRUCTION,
+    LLM_CONTINUATION_MAX_TOKENS,
+    LLM_CONTINUATION_PROMPT,
+    LLM_CHARS_PER_TOKEN,
+    LLM_MAX_CONTINUATIONS,
+    WHATSAPP_MAX_MESSAGE_LENGTH,
 )
+from app.models.llm import LLMCompletion, LLMUsage
+from app.models.meal_plan import DayPlan
+from app.services.capture import traffic_recorder
+from app.services.load import load_monitor
+from app.services.output_budget import OutputBudget, OutputBudgeter, detect_request_type
+from app.services.scheduler import llm_scheduler
+from app.services.structured_plan import (
+    IncrementalDayParser,
+    meal_plan_max_tokens,
+    meal_plan_response_format,
+    parse_day,
+)
+from app.services.tenants import tenant_registry
 
 logger = logging.getLogger(__name__)
 
@@ -20,12 +47,19 @@ logger = logging.getLogger(__name__)
 class OpenRouterService:
     """Service to interact with OpenRouter API."""
 
-    def __init__(self) -> None:
-        """Initialize OpenRouter service."""
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        """
+        Initialize OpenRouter service.
+
+        Args:
+            transport: HTTP transport override (e.g. a recorded stand-in)
+        """
+        self.transport = transport
         self.api_key = settings.openrouter_api_key
         self.base_url = OPENROUTER_API_BASE_URL
         self.app_name = settings.openrouter_app_name
         self.site_url = settings.openrouter_site_url
+        self.budgeter = OutputBudgeter()
 
     async def chat_completion(
         self,
@@ -48,15 +82,196 @@ class OpenRouterService:
         Returns:
             Response text from the model
         """
+        completion = await self.complete(
+            messages,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            reasoning=reasoning,
+        )
+        return completion.content
+
+    async def complete(
+        self,
+        messages: list[dict[str, str]],
+        model: str = DEFAULT_LLM_MODEL,
+        max_tokens: int = DEFAULT_LLM_MAX_TOKENS,
+        temperature: float = DEFAULT_LLM_TEMPERATURE,
+        reasoning: bool = DEFAULT_LLM_REASONING,
+        response_format: dict[str, Any] | None = None,
+    ) -> LLMCompletion:
+        """
+        Send chat completion request to OpenRouter, keeping response metadata.
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model: Model identifier on OpenRouter
+            max_tokens: Maximum tokens in response
+            temperature: Sampling temperature (0-1)
+            reasoning: Whether to enable reasoning mode
+            response_format: Structured output format (e.g. a JSON schema)
+
+        Returns:
+            Completion with content, finish reason and token usage
+        """
         url = f"{self.base_url}/chat/completions"
+        headers = self._headers()
+        payload = self._payload(messages, model, max_tokens, temperature, reasoning, response_format)
+
+        started = time.perf_counter()
+        async with httpx.AsyncClient(timeout=30.0, transport=self.transport) as client:
+            try:
+                logger.info(f"Sending chat completion request to {model}")
+                async with self._turn(max_tokens):
+                    started = time.perf_counter()
+                    with load_monitor.track_llm():
+                        response = await client.post(url, json=payload, headers=headers)
+                        response.raise_for_status()
+
+                data = response.json()
+                traffic_recorder.record_llm(payload, data, (time.perf_counter() - started) * 1000)
+                completion = self.parse_completion(data)
+
+                logger.info(f"Received response: {completion.content[:100]}...")
+                return completion
+
+            except httpx.HTTPError as e:
+                logger.error(f"OpenRouter API error: {e}", exc_info=True)
+                traffic_recorder.record_llm_error(payload, e, (time.perf_counter() - started) * 1000)
+                if hasattr(e, "response") and e.response is not None:
+                    logger.error(f"Response body: {e.response.text}")
+                raise
+            except (KeyError, IndexError) as e:
+                logger.error(f"Failed to parse OpenRouter response: {e}", exc_info=True)
+                raise
+
+    async def stream_completion(
+        self,
+        messages: list[dict[str, str]],
+        model: str = DEFAULT_LLM_MODEL,
+        max_tokens: int = DEFAULT_LLM_MAX_TOKENS,
+        temperature: float = DEFAULT_LLM_TEMPERATURE,
+        reasoning: bool = DEFAULT_LLM_REASONING,
+        response_format: dict[str, Any] | None = None,
+        on_complete: Callable[[LLMCompletion], None] | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion from OpenRouter.
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model: Model identifier on OpenRouter
+            max_tokens: Maximum tokens in response
+            temperature: Sampling temperature (0-1)
+            reasoning: Whether to enable reasoning mode
+            response_format: Structured output format (e.g. a JSON schema)
+            on_complete: Called with the full completion and usage at the end
+
+        Yields:
+            Content deltas as they arrive
+        """
+        url = f"{self.base_url}/chat/completions"
+        headers = self._headers()
+        payload = self._payload(messages, model, max_tokens, temperature, reasoning, response_format)
+        payload["stream"] = True
+
+        # The request runs in its own task so the fair-queue slot is released
+        # as soon as the upstream stream ends, however slowly deltas are consumed
+        queue: asyncio.Queue[str | BaseException | None] = asyncio.Queue()
+        producer = asyncio.create_task(
+            self._stream_into(queue, url, headers, payload, max_tokens, on_complete)
+        )
+        try:
+            while (item := await queue.get()) is not None:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            producer.cancel()
+
+    async def _stream_into(
+        self,
+        queue: asyncio.Queue,
+        url: str,
+        headers: dict[str, str],
+        payload: dict[str, Any],
+        max_tokens: int,
+        on_complete: Callable[[LLMCompletion], None] | None,
+    ) -> None:
+        """Stream a completion into `queue`, ending with None or the error raised."""
+        parts: list[str] = []
+        finish_reason = None
+        usage: dict[str, Any] = {}
+        started = time.perf_counter()
 
-        headers = {
+        try:
+            async with httpx.AsyncClient(timeout=30.0, transport=self.transport) as client:
+                logger.info(f"Streaming chat completion from {payload['model']}")
+                async with self._turn(max_tokens):
+                    started = time.perf_counter()
+                    with load_monitor.track_llm():
+                        async with client.stream("POST", url, json=payload, headers=headers) as response:
+                            response.raise_for_status()
+                            async for line in response.aiter_lines():
+                                # Server-sent events; lines starting with ":" are keep-alive comments
+                                if not line.startswith("data: "):
+                                    continue
+                                data = line.removeprefix("data: ").strip()
+                                if data == "[DONE]":
+                                    break
+                                chunk = json.loads(data)
+                                usage = chunk.get("usage") or usage
+                                for choice in chunk.get("choices", []):
+                                    finish_reason = choice.get("finish_reason") or finish_reason
+                                    delta = (choice.get("delta") or {}).get("content") or ""
+                                    if delta:
+                                        parts.append(delta)
+                                        queue.put_nowait(delta)
+
+            data = {
+                "choices": [{"message": {"content": "".join(parts)}, "finish_reason": finish_reason}],
+                "usage": usage,
+            }
+            traffic_recorder.record_llm(payload, data, (time.perf_counter() - started) * 1000)
+            if on_complete is not None:
+                on_complete(self.parse_completion(data))
+        except httpx.HTTPError as e:
+            logger.error(f"OpenRouter API error: {e}", exc_info=True)
+            traffic_recorder.record_llm_error(payload, e, (time.perf_counter() - started) * 1000)
+            queue.put_nowait(e)
+        except Exception as e:
+            traffic_recorder.record_llm_error(payload, e, (time.perf_counter() - started) * 1000)
+            queue.put_nowait(e)
+        else:
+            queue.put_nowait(None)
+
+    @asynccontextmanager
+    async def _turn(self, max_tokens: int) -> AsyncIterator[None]:
+        """Wait for the current tenant's LLM budget and fair-queue slot."""
+        tenant = tenant_registry.current()
+        await tenant.llm_budget.acquire()
+        async with llm_scheduler.slot(tenant.key, tenant.config.weight, max_tokens):
+            yield
+
+    def _headers(self) -> dict[str, str]:
+        """Return OpenRouter request headers."""
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "HTTP-Referer": self.site_url or "https://github.com/botatouille",
             "X-Title": self.app_name,
         }
 
+    @staticmethod
+    def _payload(
+        messages: list[dict[str, str]],
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        reasoning: bool,
+        response_format: dict[str, Any] | None,
+    ) -> dict[str, Any]:
+        """Build a chat completion request body."""
         payload = {
             "model": model,
             "messages": messages,
@@ -64,44 +279,211 @@ class OpenRouterService:
             "temperature": temperature,
             "reasoning": {"enabled": reasoning},
         }
+        if response_format is not None:
+            payload["response_format"] = response_format
+        return payload
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                logger.info(f"Sending chat completion request to {model}")
-                response = await client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
+    @staticmethod
+    def parse_completion(data: dict[str, Any]) -> LLMCompletion:
+        """
+        Parse an OpenRouter chat completion response body.
 
-                data = response.json()
-                content = data["choices"][0]["message"]["content"]
+        Raises:
+            KeyError, IndexError: If the response has no message content
+        """
+        choice = data["choices"][0]
+        return LLMCompletion(
+            content=choice["message"]["content"],
+            finish_reason=choice.get("finish_reason"),
+            usage=OpenRouterService.parse_usage(data.get("usage") or {}),
+        )
 
-                logger.info(f"Received response: {content[:100]}...")
-                return content
+    @staticmethod
+    def parse_usage(usage: dict[str, Any]) -> LLMUsage:
+        """Parse OpenRouter usage, including reasoning tokens and cost when reported."""
+        details = usage.get("completion_tokens_details") or {}
+        return LLMUsage(
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            total_tokens=usage.get("total_tokens", 0),
+            reasoning_tokens=details.get("reasoning_tokens") or 0,
+            cost=usage.get("cost"),
+        )
 
-            except httpx.HTTPError as e:
-                logger.error(f"OpenRouter API error: {e}", exc_info=True)
-                if hasattr(e, "response") and e.response is not None:
-                    logger.error(f"Response body: {e.response.text}")
-                raise
-            except (KeyError, IndexError) as e:
-                logger.error(f"Failed to parse OpenRouter response: {e}", exc_info=True)
-                raise
-
-    async def generate_meal_plan_response(self, user_message: str) -> str:
+    async def generate_meal_plan_response(
+        self,
+        user_message: str,
+        remaining_chars: int = WHATSAPP_MAX_MESSAGE_LENGTH,
+        context: str = "",
+    ) -> str:
         """
         Generate a meal planning response based on user message.
 
         Args:
             user_message: User's text message
+            remaining_chars: Characters left in the WhatsApp reply
+            context: Saved recipes to ground the answer in
 
         Returns:
             AI-generated response
         """
+        completion = await self.generate_meal_plan_completion(user_message, remaining_chars, context)
+        return completion.content
+
+    def meal_plan_request(
+        self,
+        user_message: str,
+        remaining_chars: int = WHATSAPP_MAX_MESSAGE_LENGTH,
+        context: str = "",
+    ) -> tuple[list[dict[str, str]], OutputBudget]:
+        """
+        Build the messages and output budget for a meal planning request.
+
+        Args:
+            user_message: User's text message
+            remaining_chars: Characters left in the WhatsApp reply
+            context: Saved recipes to ground the answer in
+
+        Returns:
+            Chat messages and the budget their max_tokens comes from
+        """
+        budget = self.budgeter.plan(detect_request_type(user_message), remaining_chars)
         messages = [
-            {"role": "system", "content": MEAL_PLANNING_SYSTEM_PROMPT},
+            {
+                "role": "system",
+                "content": f"{MEAL_PLANNING_SYSTEM_PROMPT}\n{budget.style_directive}",
+            },
             {"role": "user", "content": user_message},
         ]
+        if context:
+            messages.insert(
+                1, {"role": "system", "content": RECIPE_GROUNDING_PROMPT.format(recipes=context)}
+            )
+        return messages, budget
 
-        return await self.chat_completion(messages)
+    async def generate_meal_plan_completion(
+        self,
+        user_message: str,
+        remaining_chars: int = WHATSAPP_MAX_MESSAGE_LENGTH,
+        context: str = "",
+    ) -> LLMCompletion:
+        """
+        Generate a meal planning completion with aggregated token usage.
+
+        max_tokens and the response style are picked from the detected
+        request type and the remaining WhatsApp length budget. Truncated
+        outputs are continued rather than regenerated.
+
+        Args:
+            user_message: User's text message
+            remaining_chars: Characters left in the WhatsApp reply
+            context: Saved recipes to ground the answer in
+
+        Returns:
+            Completion whose usage sums the initial call and continuations
+        """
+        messages, budget = self.meal_plan_request(user_message, remaining_chars, context)
+        request_type = budget.request_type
+        logger.info(f"Request type {request_type}, max_tokens={budget.max_tokens}")
+
+        completion = await self.complete(messages, max_tokens=budget.max_tokens)
+        content = completion.content
+        usage = completion.usage.model_copy()
+
+        continuations = 0
+        while completion.truncated and continuations < LLM_MAX_CONTINUATIONS:
+            chars_left = budget.max_chars - len(content)
+            max_tokens = min(LLM_CONTINUATION_MAX_TOKENS, chars_left // LLM_CHARS_PER_TOKEN)
+            if max_tokens <= 0:
+                break
+
+            continuations += 1
+            logger.info(f"Response truncated, continuing ({continuations}/{LLM_MAX_CONTINUATIONS})")
+            completion = await self.complete(
+                messages
+                + [
+                    {"role": "assistant", "content": content},
+                    {"role": "user", "content": LLM_CONTINUATION_PROMPT},
+                ],
+                max_tokens=max_tokens,
+            )
+            content += completion.content
+            usage.prompt_tokens += completion.usage.prompt_tokens
+            usage.completion_tokens += completion.usage.completion_tokens
+            usage.total_tokens += completion.usage.total_tokens
+
+        self.budgeter.record(request_type, usage.completion_tokens)
+        return LLMCompletion(content=content, finish_reason=completion.finish_reason, usage=usage)
+
+    async def stream_meal_plan(
+        self,
+        user_message: str,
+        days: list[str] = DAYS_OF_WEEK,
+        context: str = "",
+        on_usage: Callable[[LLMUsage], None] | None = None,
+    ) -> AsyncIterator[DayPlan]:
+        """
+        Stream a structured meal plan, yielding each day once it is complete.
+
+        Days that come back malformed, invalid or missing (for example
+        after truncation) are requested again in one small follow-up call
+        instead of regenerating the whole plan.
+
+        Args:
+            user_message: User's text message
+            days: Days to plan, in order
+            context: Saved recipes to ground the plan in
+            on_usage: Called with the token usage of each LLM call
+
+        Yields:
+            Validated days, in the order they complete
+        """
+        messages = [
+            {"role": "system", "content": f"{MEAL_PLANNING_SYSTEM_PROMPT}\n{MEAL_PLAN_JSON_INSTRUCTION}"},
+            {"role": "user", "content": user_message},
+        ]
+        if context:
+            messages.insert(
+                1, {"role": "system", "content": RECIPE_GROUNDING_PROMPT.format(recipes=context)}
+            )
+
+        delivered: set[str] = set()
+        parser = IncrementalDayParser()
+        async for chunk in self.stream_completion(
+            messages,
+            max_tokens=meal_plan_max_tokens(len(days)),
+            response_format=meal_plan_response_format(days),
+            on_complete=(lambda completion: on_usage(completion.usage)) if on_usage else None,
+        ):
+            for raw in parser.feed(chunk):
+                day = parse_day(raw, [d for d in days if d not in delivered])
+                if day is not None:
+                    delivered.add(day.day)
+                    yield day
+
+        missing = [d for d in days if d not in delivered]
+        if not missing:
+            return
+
+        logger.warning(f"Repairing meal plan days: {missing}")
+        repair_messages = messages[:-1] + [
+            {
+                "role": "user",
+                "content": f"{user_message}\n{MEAL_PLAN_REPAIR_INSTRUCTION.format(days=', '.join(missing))}",
+            }
+        ]
+        completion = await self.complete(
+            repair_messages,
+            max_tokens=meal_plan_max_tokens(len(missing)),
+            response_format=meal_plan_response_format(missing),
+        )
+        if on_usage is not None:
+            on_usage(completion.usage)
+        for raw in IncrementalDayParser().feed(completion.content):
+            day = parse_day(raw, [d for d in missing if d not in delivered])
+            if day is not None:
+                delivered.add(day.day)
+                yield day
 
 
 # Global instance
@@ -0,0 +1,180 @@
+"""Load monitoring, readiness and admission control."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterator
+
+from app.core.config import settings
+from app.core.constants import (
+    LOAD_CRITICAL_FACTOR,
+    LOAD_DEFER_MAX_WAIT_SECONDS,
+    LOAD_DEFER_POLL_SECONDS,
+    LOAD_ERROR_MIN_SAMPLES,
+    LOAD_ERROR_WINDOW_SECONDS,
+    LOAD_LAG_PROBE_INTERVAL_SECONDS,
+    LOAD_MAX_DEFERRED,
+    LOAD_MAX_IN_FLIGHT_MESSAGES,
+    LOAD_MAX_LOOP_LAG_MS,
+    LOAD_MAX_QUEUED_LLM,
+    LOAD_MAX_UPSTREAM_ERROR_RATE,
+)
+from app.services.scheduler import FairScheduler, llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+ADMIT = "admit"
+SHED_BUSY_REPLY = "busy_reply"
+SHED_ACK = "ack"
+SHED_DEFER = "defer"
+
+
+class LoadMonitor:
+    """Track event-loop lag, in-flight and queued work and upstream error rate."""
+
+    def __init__(self, scheduler: FairScheduler | None = None) -> None:
+        """Initialize counters; queued LLM requests are read from the scheduler."""
+        self.scheduler = scheduler or llm_scheduler
+        self.loop_lag_ms = 0.0
+        self.in_flight_llm = 0
+        self.in_flight_messages = 0
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._lag_task: asyncio.Task | None = None
+
+    @contextmanager
+    def track_llm(self) -> Iterator[None]:
+        """Count an LLM request as in flight and record its outcome."""
+        self.in_flight_llm += 1
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.in_flight_llm -= 1
+            self.record_upstream(ok)
+
+    @contextmanager
+    def track_message(self) -> Iterator[None]:
+        """Count a message as being processed."""
+        self.in_flight_messages += 1
+        try:
+            yield
+        finally:
+            self.in_flight_messages -= 1
+
+    def record_upstream(self, ok: bool) -> None:
+        """Record the outcome of an upstream call."""
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        while self._outcomes and self._outcomes[0][0] < now - LOAD_ERROR_WINDOW_SECONDS:
+            self._outcomes.popleft()
+
+    @property
+    def upstream_error_rate(self) -> float:
+        """Fraction of failed upstream calls in the window (0 with too few samples)."""
+        cutoff = time.monotonic() - LOAD_ERROR_WINDOW_SECONDS
+        outcomes = [ok for ts, ok in self._outcomes if ts >= cutoff]
+        if len(outcomes) < LOAD_ERROR_MIN_SAMPLES:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+    def pressure(self) -> dict[str, float]:
+        """
+        Return each load signal as a fraction of its limit.
+
+        A value of 1.0 or more means that signal is over its limit. In-flight
+        LLM requests are not a signal: the scheduler caps them at its
+        concurrency, so all slots busy is normal use and a backlog shows up
+        as queued LLM requests.
+        """
+        return {
+            "loop_lag": self.loop_lag_ms / LOAD_MAX_LOOP_LAG_MS,
+            "llm_queue": self.scheduler.waiting / LOAD_MAX_QUEUED_LLM,
+            "queue": self.in_flight_messages / LOAD_MAX_IN_FLIGHT_MESSAGES,
+            "upstream_errors": self.upstream_error_rate / LOAD_MAX_UPSTREAM_ERROR_RATE,
+        }
+
+    def readiness(self) -> dict[str, Any]:
+        """Return readiness with the signals that make the process not ready."""
+        pressure = self.pressure()
+        return {
+            "ready": all(value < 1.0 for value in pressure.values()),
+            "overloaded": sorted(name for name, value in pressure.items() if value >= 1.0),
+            "loop_lag_ms": round(self.loop_lag_ms, 1),
+            "in_flight_llm": self.in_flight_llm,
+            "queued_llm": self.scheduler.waiting,
+            "in_flight_messages": self.in_flight_messages,
+            "upstream_error_rate": round(self.upstream_error_rate, 3),
+        }
+
+    async def _measure_lag(self) -> None:
+        """Measure how late the loop wakes up from a fixed sleep."""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(LOAD_LAG_PROBE_INTERVAL_SECONDS)
+            elapsed = time.perf_counter() - started
+            self.loop_lag_ms = max(0.0, (elapsed - LOAD_LAG_PROBE_INTERVAL_SECONDS) * 1000)
+
+    def start(self) -> None:
+        """Start measuring event-loop lag."""
+        if self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._measure_lag())
+
+    async def stop(self) -> None:
+        """Stop measuring event-loop lag."""
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
+
+
+class AdmissionController:
+    """Decide whether to process, reply busy, acknowledge only or defer new work."""
+
+    def __init__(self, monitor: LoadMonitor, mode: str | None = None) -> None:
+        """Initialize the controller with a shedding mode."""
+        self.monitor = monitor
+        self.mode = mode or settings.load_shed_mode
+        self._deferred: set[asyncio.Task] = set()
+
+    def decide(self) -> str:
+        """
+        Return the admission decision for a new message.
+
+        Past the critical factor on any signal, messages are only
+        acknowledged; the configured mode applies below that.
+        """
+        peak = max(self.monitor.pressure().values())
+        if peak < 1.0:
+            return ADMIT
+        if peak >= LOAD_CRITICAL_FACTOR:
+            return SHED_ACK
+        if self.mode == SHED_DEFER and len(self._deferred) >= LOAD_MAX_DEFERRED:
+            return SHED_BUSY_REPLY
+        return self.mode
+
+    def defer(self, work: Callable[[], Awaitable[None]]) -> None:
+        """Run work in the background once the process is ready again."""
+        task = asyncio.create_task(self._run_deferred(work))
+        self._deferred.add(task)
+        task.add_done_callback(self._deferred.discard)
+
+    async def _run_deferred(self, work: Callable[[], Awaitable[None]]) -> None:
+        """Wait for readiness (bounded), then run the work."""
+        deadline = time.monotonic() + LOAD_DEFER_MAX_WAIT_SECONDS
+        while not self.monitor.readiness()["ready"] and time.monotonic() < deadline:
+            await asyncio.sleep(LOAD_DEFER_POLL_SECONDS)
+        try:
+            await work()
+        except Exception as e:
+            logger.error(f"Deferred work failed: {e}", exc_info=True)
+
+
+# Global instances
+load_monitor = LoadMonitor()
+admission_controller = AdmissionController(load_monitor)
@@ -0,0 +1,60 @@
+"""MinHash fingerprints for near-duplicate text detection."""
+
+import hashlib
+import random
+import re
+
+from app.core.constants import (
+    RECIPE_MINHASH_BANDS,
+    RECIPE_MINHASH_PERMUTATIONS,
+    RECIPE_SHINGLE_SIZE,
+)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Fixed seed: signatures must stay comparable across processes and restarts
+_rng = random.Random(1234)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(RECIPE_MINHASH_PERMUTATIONS)
+]
+
+
+def shingles(text: str, size: int = RECIPE_SHINGLE_SIZE) -> set[str]:
+    """Return the set of word n-grams of a text."""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def signature(text: str) -> list[int]:
+    """Compute the MinHash signature of a text."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for shingle in shingles(text)
+    ]
+    if not hashes:
+        return [_MAX_HASH] * RECIPE_MINHASH_PERMUTATIONS
+    return [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def similarity(first: list[int], second: list[int]) -> float:
+    """Estimate the Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+def bands(sig: list[int], band_count: int = RECIPE_MINHASH_BANDS) -> list[str]:
+    """Split a signature into LSH band keys; similar texts share at least one."""
+    rows = len(sig) // band_count
+    return [
+        hashlib.blake2b(
+            ",".join(map(str, sig[i * rows:(i + 1) * rows])).encode("ascii"), digest_size=8
+        ).hexdigest()
+        for i in range(band_count)
+    ]
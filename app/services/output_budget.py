@@ -0,0 +1,137 @@
+"""Per-request output budgeting for LLM calls."""
+
+import logging
+import math
+import re
+from collections import deque
+from dataclasses import dataclass
+
+from app.core.constants import (
+    LLM_BUDGET_HEADROOM,
+    LLM_BUDGET_MIN_SAMPLES,
+    LLM_BUDGET_PERCENTILE,
+    LLM_BUDGET_SAMPLE_SIZE,
+    LLM_CHARS_PER_TOKEN,
+    LLM_MAX_TOKENS_BY_REQUEST_TYPE,
+    LLM_MIN_MAX_TOKENS,
+    LLM_RESPONSE_STYLE_BY_REQUEST_TYPE,
+    REQUEST_TYPE_KEYWORDS,
+    WHATSAPP_MAX_MESSAGE_LENGTH,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REQUEST_TYPE = "chat"
+
+_KEYWORD_PATTERNS = {
+    request_type: re.compile(
+        r"\b(" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b",
+        re.IGNORECASE,
+    )
+    for request_type, keywords in REQUEST_TYPE_KEYWORDS.items()
+}
+
+
+def detect_request_type(text: str) -> str:
+    """
+    Classify a user message into a request type.
+
+    Args:
+        text: User's text message
+
+    Returns:
+        One of the keys of LLM_MAX_TOKENS_BY_REQUEST_TYPE
+    """
+    for request_type, pattern in _KEYWORD_PATTERNS.items():
+        if pattern.search(text):
+            return request_type
+    return DEFAULT_REQUEST_TYPE
+
+
+@dataclass(frozen=True)
+class OutputBudget:
+    """Output limits and style directive for a single LLM call."""
+
+    request_type: str
+    max_tokens: int
+    max_chars: int
+    style_directive: str
+
+
+class OutputBudgeter:
+    """Pick max_tokens per request and learn limits from observed usage."""
+
+    def __init__(self, sample_size: int = LLM_BUDGET_SAMPLE_SIZE) -> None:
+        """Initialize the budgeter with empty usage history."""
+        self._samples: dict[str, deque[int]] = {
+            request_type: deque(maxlen=sample_size)
+            for request_type in LLM_MAX_TOKENS_BY_REQUEST_TYPE
+        }
+
+    def learned_limit(self, request_type: str) -> int | None:
+        """
+        Return the usage-derived token limit for a request type.
+
+        The limit is the configured percentile of observed completion
+        tokens plus headroom, or None until enough samples are collected.
+        """
+        samples = self._samples.get(request_type)
+        if not samples or len(samples) < LLM_BUDGET_MIN_SAMPLES:
+            return None
+
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, math.ceil(LLM_BUDGET_PERCENTILE * len(ordered)) - 1)
+        return math.ceil(ordered[index] * LLM_BUDGET_HEADROOM)
+
+    def plan(
+        self,
+        request_type: str,
+        remaining_chars: int = WHATSAPP_MAX_MESSAGE_LENGTH,
+    ) -> OutputBudget:
+        """
+        Compute the output budget for a request.
+
+        Args:
+            request_type: Detected request type
+            remaining_chars: Characters left in the WhatsApp message
+
+        Returns:
+            Budget with max_tokens and a response-style directive
+        """
+        cap = LLM_MAX_TOKENS_BY_REQUEST_TYPE.get(
+            request_type, LLM_MAX_TOKENS_BY_REQUEST_TYPE[DEFAULT_REQUEST_TYPE]
+        )
+        learned = self.learned_limit(request_type)
+        if learned is not None:
+            cap = min(cap, learned)
+
+        length_cap = remaining_chars // LLM_CHARS_PER_TOKEN
+        max_tokens = max(LLM_MIN_MAX_TOKENS, min(cap, length_cap))
+
+        style = LLM_RESPONSE_STYLE_BY_REQUEST_TYPE.get(
+            request_type, LLM_RESPONSE_STYLE_BY_REQUEST_TYPE[DEFAULT_REQUEST_TYPE]
+        )
+        directive = f"{style} Keep the whole reply under {remaining_chars} characters."
+
+        return OutputBudget(
+            request_type=request_type,
+            max_tokens=max_tokens,
+            max_chars=remaining_chars,
+            style_directive=directive,
+        )
+
+    def record(self, request_type: str, completion_tokens: int) -> None:
+        """
+        Record observed completion tokens for a request type.
+
+        Args:
+            request_type: Request type the completion was generated for
+            completion_tokens: Total completion tokens, including continuations
+        """
+        if completion_tokens <= 0:
+            return
+        samples = self._samples.setdefault(
+            request_type, deque(maxlen=LLM_BUDGET_SAMPLE_SIZE)
+        )
+        samples.append(completion_tokens)
+        logger.debug(f"Recorded {completion_tokens} completion tokens for {request_type}")
@@ -0,0 +1,219 @@
+"""SQLite store for user preferences and precomputed weekly meal plans."""
+
+import hashlib
+import logging
+import sqlite3
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    phone TEXT PRIMARY KEY,
+    preferences TEXT NOT NULL DEFAULT '',
+    preferences_hash TEXT NOT NULL,
+    last_active TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS plan_jobs (
+    phone TEXT NOT NULL,
+    week_start TEXT NOT NULL,
+    status TEXT NOT NULL,
+    preferences_hash TEXT NOT NULL,
+    plan TEXT,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (phone, week_start)
+);
+"""
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+def preferences_hash(preferences: str) -> str:
+    """Return a stable hash of normalized preference text."""
+    normalized = " ".join(preferences.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def plan_week_start(now: datetime | None = None) -> date:
+    """Return the Monday a weekly plan requested at `now` is for (today if Monday)."""
+    today = (now or datetime.now(UTC)).date()
+    return today + timedelta(days=(7 - today.weekday()) % 7)
+
+
+class PlanStore:
+    """Persistent users and plan job table backed by SQLite."""
+
+    def __init__(self, path: str | None = None) -> None:
+        """Initialize the store; the database is opened on first use."""
+        self.path = path or settings.sqlite_path
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Open the database and create tables on first access."""
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript(SCHEMA)
+            # Jobs interrupted by a restart are picked up again on the next run
+            self._conn.execute(
+                "UPDATE plan_jobs SET status = ? WHERE status = ?", (JOB_PENDING, JOB_RUNNING)
+            )
+            self._conn.commit()
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def touch(self, phone: str) -> None:
+        """Mark a user as active now, creating them if needed."""
+        now = datetime.now(UTC).isoformat()
+        self.conn.execute(
+            """
+            INSERT INTO users (phone, preferences_hash, last_active) VALUES (?, ?, ?)
+            ON CONFLICT (phone) DO UPDATE SET last_active = excluded.last_active
+            """,
+            (phone, preferences_hash(""), now),
+        )
+        self.conn.commit()
+
+    def set_preferences(self, phone: str, preferences: str) -> None:
+        """Store a user's meal preferences."""
+        now = datetime.now(UTC).isoformat()
+        self.conn.execute(
+            """
+            INSERT INTO users (phone, preferences, preferences_hash, last_active)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (phone) DO UPDATE SET
+                preferences = excluded.preferences,
+                preferences_hash = excluded.preferences_hash,
+                last_active = excluded.last_active
+            """,
+            (phone, preferences, preferences_hash(preferences), now),
+        )
+        self.conn.commit()
+
+    def get_preferences(self, phone: str) -> str:
+        """Return a user's stored preferences, or an empty string."""
+        row = self.conn.execute(
+            "SELECT preferences FROM users WHERE phone = ?", (phone,)
+        ).fetchone()
+        return row["preferences"] if row else ""
+
+    def active_users(self, since: datetime) -> list[sqlite3.Row]:
+        """Return users active since the given time."""
+        return self.conn.execute(
+            "SELECT phone, preferences, preferences_hash FROM users WHERE last_active >= ?",
+            (since.isoformat(),),
+        ).fetchall()
+
+    def get_fresh_plan(self, phone: str, week_start: date) -> str | None:
+        """
+        Return a finished plan if it was built from the user's current preferences.
+
+        Args:
+            phone: User phone number
+            week_start: Monday of the planned week
+
+        Returns:
+            Plan text, or None if missing or stale
+        """
+        row = self.conn.execute(
+            """
+            SELECT j.plan FROM plan_jobs j JOIN users u ON u.phone = j.phone
+            WHERE j.phone = ? AND j.week_start = ? AND j.status = ?
+              AND j.preferences_hash = u.preferences_hash
+            """,
+            (phone, week_start.isoformat(), JOB_DONE),
+        ).fetchone()
+        return row["plan"] if row else None
+
+    def enqueue(self, phone: str, week_start: date, prefs_hash: str) -> bool:
+        """
+        Create a pending job unless a current one exists.
+
+        Returns:
+            True if a job was (re)queued
+        """
+        row = self.conn.execute(
+            "SELECT status, preferences_hash FROM plan_jobs WHERE phone = ? AND week_start = ?",
+            (phone, week_start.isoformat()),
+        ).fetchone()
+        if row and row["preferences_hash"] == prefs_hash and row["status"] != JOB_FAILED:
+            return row["status"] == JOB_PENDING
+
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO plan_jobs (phone, week_start, status, preferences_hash, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (phone, week_start.isoformat(), JOB_PENDING, prefs_hash, datetime.now(UTC).isoformat()),
+        )
+        self.conn.commit()
+        return True
+
+    def pending_jobs(self, week_start: date) -> list[sqlite3.Row]:
+        """Return pending jobs for a week."""
+        return self.conn.execute(
+            "SELECT phone, preferences_hash FROM plan_jobs WHERE week_start = ? AND status = ?",
+            (week_start.isoformat(), JOB_PENDING),
+        ).fetchall()
+
+    def set_status(self, phone: str, week_start: date, status: str, error: str | None = None) -> None:
+        """Update a job's status."""
+        self.conn.execute(
+            "UPDATE plan_jobs SET status = ?, error = ?, updated_at = ? WHERE phone = ? AND week_start = ?",
+            (status, error, datetime.now(UTC).isoformat(), phone, week_start.isoformat()),
+        )
+        self.conn.commit()
+
+    def save_plan(
+        self,
+        phone: str,
+        week_start: date,
+        prefs_hash: str,
+        plan: str,
+        tokens: int = 0,
+    ) -> None:
+        """Store a finished plan for a user and week."""
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO plan_jobs
+                (phone, week_start, status, preferences_hash, plan, tokens, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                phone,
+                week_start.isoformat(),
+                JOB_DONE,
+                prefs_hash,
+                plan,
+                tokens,
+                datetime.now(UTC).isoformat(),
+            ),
+        )
+        self.conn.commit()
+
+    def current_preferences_hash(self, phone: str) -> str:
+        """Return the hash of a user's current preferences."""
+        row = self.conn.execute(
+            "SELECT preferences_hash FROM users WHERE phone = ?", (phone,)
+        ).fetchone()
+        return row["preferences_hash"] if row else preferences_hash("")
+
+
+# Global instance
+plan_store = PlanStore()
@@ -0,0 +1,267 @@
+"""Off-peak precomputation of next week's meal plans."""
+
+import asyncio
+import logging
+import re
+from datetime import UTC, date, datetime, timedelta
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.constants import (
+    DAYS_OF_WEEK,
+    INCOMPLETE_PLAN_MESSAGE,
+    PRECOMPUTE_ACTIVE_DAYS,
+    PRECOMPUTE_MAX_CONCURRENCY,
+    PRECOMPUTE_RUN_TOKEN_BUDGET,
+    PRECOMPUTE_TICK_SECONDS,
+    PRECOMPUTE_WEEKDAYS,
+    PRECOMPUTE_WINDOW_END_HOUR,
+    PRECOMPUTE_WINDOW_START_HOUR,
+    PREFERENCES_COMMAND_PREFIXES,
+    WEEKLY_PLAN_KEYWORDS,
+    WEEKLY_PLAN_PROMPT,
+)
+from app.models.llm import LLMUsage
+from app.models.meal_plan import DayPlan, MealPlan
+from app.services.llm import OpenRouterService, llm_service
+from app.services.output_budget import detect_request_type
+from app.services.plan_store import (
+    JOB_FAILED,
+    JOB_RUNNING,
+    PlanStore,
+    plan_store,
+    plan_week_start,
+)
+from app.services.structured_plan import meal_plan_max_tokens
+
+logger = logging.getLogger(__name__)
+
+_WEEKLY_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(keyword) for keyword in WEEKLY_PLAN_KEYWORDS) + r")\b",
+    re.IGNORECASE,
+)
+
+
+def parse_preferences_command(text: str) -> str | None:
+    """Return the preference text if the message sets preferences, else None."""
+    stripped = text.strip()
+    for prefix in PREFERENCES_COMMAND_PREFIXES:
+        if stripped.lower().startswith(prefix):
+            return stripped[len(prefix):].strip()
+    return None
+
+
+def is_weekly_plan_request(text: str) -> bool:
+    """Whether the message asks for a whole-week meal plan."""
+    return detect_request_type(text) == "meal_plan" and bool(_WEEKLY_PATTERN.search(text))
+
+
+def build_plan_prompt(week_start: date, preferences: str, user_message: str | None = None) -> str:
+    """Build the user prompt for a weekly plan, including stored preferences."""
+    prompt = user_message or WEEKLY_PLAN_PROMPT.format(week_start=week_start.isoformat())
+    if preferences:
+        prompt += f"\nMy preferences: {preferences}"
+    return prompt
+
+
+def full_week(days: list[DayPlan]) -> MealPlan | None:
+    """Return the days as a Monday-to-Sunday plan, or None if any day is missing."""
+    by_day = {day.day: day for day in days}
+    if any(day not in by_day for day in DAYS_OF_WEEK):
+        return None
+    return MealPlan(days=[by_day[day] for day in DAYS_OF_WEEK])
+
+
+def load_plan(stored: str | None) -> MealPlan | None:
+    """Parse a stored plan; plans not in the MealPlan format are treated as missing."""
+    if stored is None:
+        return None
+    try:
+        return MealPlan.model_validate_json(stored)
+    except ValidationError:
+        logger.info("Ignoring stored plan in an outdated format")
+        return None
+
+
+class MealPlanPrecomputer:
+    """In-process scheduler that pregenerates weekly plans during off-peak hours."""
+
+    def __init__(
+        self,
+        store: PlanStore = plan_store,
+        llm: OpenRouterService = llm_service,
+        max_concurrency: int = PRECOMPUTE_MAX_CONCURRENCY,
+        token_budget: int = PRECOMPUTE_RUN_TOKEN_BUDGET,
+    ) -> None:
+        """Initialize the precomputer."""
+        self.store = store
+        self.llm = llm
+        self.max_concurrency = max_concurrency
+        self.token_budget = token_budget
+        self._task: asyncio.Task | None = None
+        self._last_run_date: date | None = None
+
+    @staticmethod
+    def in_offpeak_window(now: datetime) -> bool:
+        """Whether `now` (UTC) falls inside the precomputation window."""
+        return (
+            now.weekday() in PRECOMPUTE_WEEKDAYS
+            and PRECOMPUTE_WINDOW_START_HOUR <= now.hour < PRECOMPUTE_WINDOW_END_HOUR
+        )
+
+    async def stream_weekly_plan(
+        self, phone: str, user_message: str, context: str = ""
+    ) -> AsyncIterator[str]:
+        """
+        Serve a weekly plan, using the precomputed one when still fresh.
+
+        A plan is regenerated only if the user's preferences changed since
+        it was built. Live plans are streamed one day at a time so the user
+        sees Monday while the rest is still generating, then stored (only
+        if every day arrived) so repeat requests are instant. Days still
+        missing after the repair call are named in a closing message.
+
+        Args:
+            phone: User phone number
+            user_message: User's text message
+            context: Saved recipes to ground a live plan in
+
+        Yields:
+            The whole precomputed plan, or one message per generated day
+            (plus a note on missing days)
+        """
+        week_start = plan_week_start()
+        self.store.touch(phone)
+
+        plan = load_plan(self.store.get_fresh_plan(phone, week_start))
+        if plan is not None:
+            logger.info(f"Serving precomputed plan for {phone}, week {week_start}")
+            yield plan.to_text()
+            return
+
+        preferences = self.store.get_preferences(phone)
+        days: list[DayPlan] = []
+        async for day in self.llm.stream_meal_plan(
+            build_plan_prompt(week_start, preferences, user_message), context=context
+        ):
+            days.append(day)
+            yield day.to_text()
+
+        plan = full_week(days)
+        if plan is None:
+            logger.warning(f"Incomplete plan for {phone} ({len(days)} days), not storing it")
+            delivered = {day.day for day in days}
+            missing = [day.capitalize() for day in DAYS_OF_WEEK if day not in delivered]
+            yield INCOMPLETE_PLAN_MESSAGE.format(days=", ".join(missing))
+            return
+        self.store.save_plan(
+            phone, week_start, self.store.current_preferences_hash(phone), plan.model_dump_json()
+        )
+
+    async def run_once(self, now: datetime | None = None) -> dict[str, int]:
+        """
+        Enqueue and run plan jobs for active users.
+
+        Jobs run with bounded concurrency; no new job starts once the
+        completion tokens spent plus the reservation for in-flight jobs
+        would exceed the run's token budget. A job is reserved the
+        max_tokens of its plan request plus a repair call of the same size.
+
+        Args:
+            now: Current time (UTC), defaults to now
+
+        Returns:
+            Counts of completed, failed and skipped jobs and completion tokens spent
+        """
+        now = now or datetime.now(UTC)
+        week_start = plan_week_start(now)
+        since = now - timedelta(days=PRECOMPUTE_ACTIVE_DAYS)
+
+        for user in self.store.active_users(since):
+            self.store.enqueue(user["phone"], week_start, user["preferences_hash"])
+
+        jobs = self.store.pending_jobs(week_start)
+        stats = {"completed": 0, "failed": 0, "skipped": 0, "tokens": 0}
+        reservation = 2 * meal_plan_max_tokens(len(DAYS_OF_WEEK))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        in_flight = 0
+
+        async def run_job(phone: str, prefs_hash: str) -> None:
+            nonlocal in_flight
+            try:
+                preferences = self.store.get_preferences(phone)
+                tokens = 0
+
+                def add_usage(usage: LLMUsage) -> None:
+                    nonlocal tokens
+                    tokens += usage.completion_tokens
+                    stats["tokens"] += usage.completion_tokens
+
+                days = [
+                    day
+                    async for day in self.llm.stream_meal_plan(
+                        build_plan_prompt(week_start, preferences), on_usage=add_usage
+                    )
+                ]
+                plan = full_week(days)
+                if plan is None:
+                    raise ValueError(f"Incomplete plan: {len(days)} of {len(DAYS_OF_WEEK)} days")
+                self.store.save_plan(phone, week_start, prefs_hash, plan.model_dump_json(), tokens)
+                stats["completed"] += 1
+            except Exception as e:
+                logger.error(f"Precompute failed for {phone}: {e}", exc_info=True)
+                self.store.set_status(phone, week_start, JOB_FAILED, str(e))
+                stats["failed"] += 1
+            finally:
+                in_flight -= 1
+                semaphore.release()
+
+        tasks = []
+        for job in jobs:
+            await semaphore.acquire()
+            if stats["tokens"] + (in_flight + 1) * reservation > self.token_budget:
+                semaphore.release()
+                stats["skipped"] = len(jobs) - len(tasks)
+                logger.info(f"Precompute token budget reached, {stats['skipped']} jobs left pending")
+                break
+            in_flight += 1
+            self.store.set_status(job["phone"], week_start, JOB_RUNNING)
+            tasks.append(asyncio.create_task(run_job(job["phone"], job["preferences_hash"])))
+
+        await asyncio.gather(*tasks)
+        logger.info(f"Precompute run for week {week_start}: {stats}")
+        return stats
+
+    async def _loop(self) -> None:
+        """Run once per night inside the off-peak window."""
+        while True:
+            now = datetime.now(UTC)
+            if self.in_offpeak_window(now) and self._last_run_date != now.date():
+                self._last_run_date = now.date()
+                try:
+                    await self.run_once(now)
+                except Exception as e:
+                    logger.error(f"Precompute run failed: {e}", exc_info=True)
+            await asyncio.sleep(PRECOMPUTE_TICK_SECONDS)
+
+    def start(self) -> None:
+        """Start the background scheduler if enabled."""
+        if settings.precompute_enabled and self._task is None:
+            logger.info("Starting meal plan precompute scheduler")
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background scheduler."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global instance
+meal_plan_precomputer = MealPlanPrecomputer()
@@ -0,0 +1,169 @@
+"""Event-loop blocking detection and on-demand sampling profiles."""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import UTC, datetime
+from types import FrameType
+from typing import Any
+
+from app.core.constants import (
+    LOOP_BLOCK_THRESHOLD_MS,
+    LOOP_HEARTBEAT_SECONDS,
+    LOOP_STALL_HISTORY,
+    PROFILE_DEFAULT_INTERVAL_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LoopBlockingDetector:
+    """
+    Watchdog that samples the event loop's stack when a callback blocks.
+
+    A heartbeat task stamps the time on every loop iteration it gets; a
+    separate thread notices when the stamp goes stale for longer than the
+    threshold and captures what the loop thread is executing.
+    """
+
+    def __init__(self, threshold_ms: float = LOOP_BLOCK_THRESHOLD_MS) -> None:
+        """Initialize the detector."""
+        self.threshold_ms = threshold_ms
+        self.stalls: deque[dict[str, Any]] = deque(maxlen=LOOP_STALL_HISTORY)
+        self._last_beat = time.monotonic()
+        self._current_stall: dict[str, Any] | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat_task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    async def _heartbeat(self) -> None:
+        """Stamp the time on each loop turn and close any finished stall."""
+        while True:
+            now = time.monotonic()
+            stall = self._current_stall
+            if stall is not None:
+                stall["blocked_ms"] = round((now - self._last_beat) * 1000, 1)
+                logger.warning(f"Event loop was blocked for {stall['blocked_ms']} ms")
+                self._current_stall = None
+            self._last_beat = now
+            await asyncio.sleep(LOOP_HEARTBEAT_SECONDS)
+
+    def _watch(self) -> None:
+        """Watchdog thread: capture the loop stack when the heartbeat goes stale."""
+        while not self._stop.wait(LOOP_HEARTBEAT_SECONDS):
+            last_beat = self._last_beat
+            blocked_ms = (time.monotonic() - last_beat) * 1000
+            if blocked_ms < self.threshold_ms + LOOP_HEARTBEAT_SECONDS * 1000:
+                continue
+            if self._current_stall is not None and self._current_stall["beat"] == last_beat:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            stall = {
+                "beat": last_beat,
+                "at": datetime.now(UTC).isoformat(),
+                "blocked_ms": round(blocked_ms, 1),
+                "stack": stack,
+            }
+            self._current_stall = stall
+            self.stalls.append(stall)
+            logger.warning(f"Event loop blocked for over {self.threshold_ms} ms in:\n{stack}")
+
+    def recent_stalls(self) -> list[dict[str, Any]]:
+        """Return recent stalls, newest first."""
+        return [
+            {key: value for key, value in stall.items() if key != "beat"}
+            for stall in reversed(self.stalls)
+        ]
+
+    def start(self) -> None:
+        """Start the heartbeat on the running loop and the watchdog thread."""
+        if self._heartbeat_task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and the watchdog thread."""
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+
+def _folded_stack(thread_name: str, frame: FrameType | None) -> str:
+    """Render a frame as a root-first, semicolon-separated stack."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join([thread_name, *reversed(names)])
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling every thread's stack from a side thread."""
+
+    def __init__(self) -> None:
+        """Initialize the profiler."""
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Whether a profile is being captured."""
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval_ms: float = PROFILE_DEFAULT_INTERVAL_MS) -> str:
+        """
+        Sample all threads for a time box.
+
+        Blocking; run it in a worker thread so the event loop keeps serving.
+
+        Args:
+            seconds: Profile duration
+            interval_ms: Time between samples
+
+        Returns:
+            Folded stacks ("thread;outer;inner count" per line), the input
+            format of flamegraph.pl and speedscope
+
+        Raises:
+            RuntimeError: If another profile is already running
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            own_id = threading.get_ident()
+            counts: Counter[str] = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id != own_id:
+                        counts[_folded_stack(names.get(thread_id, str(thread_id)), frame)] += 1
+                time.sleep(interval_ms / 1000)
+            return "\n".join(f"{stack} {count}" for stack, count in counts.most_common())
+        finally:
+            self._lock.release()
+
+
+# Global instances
+loop_blocking_detector = LoopBlockingDetector()
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,462 @@
+"""Recipe library: SQLite FTS5 search, attribute indexes and near-duplicate detection."""
+
+import json
+import logging
+import re
+import sqlite3
+from datetime import UTC, datetime
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.constants import (
+    RECIPE_DIET_KEYWORDS,
+    RECIPE_DUPLICATE_MESSAGE,
+    RECIPE_DUPLICATE_THRESHOLD,
+    RECIPE_GROUNDING_LIMIT,
+    RECIPE_GROUNDING_MAX_CHARS,
+    RECIPE_QUICK_PREP_MINUTES,
+    RECIPE_SAVED_MESSAGE,
+    RECIPE_SEARCH_LIMIT,
+    RECIPE_STOPWORDS,
+    RECIPE_UNITS,
+    SAVE_RECIPE_COMMAND_PREFIXES,
+)
+from app.models.recipe import Recipe, RecipeQuery
+from app.services import minhash
+from app.services.output_budget import detect_request_type
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY,
+    phone TEXT NOT NULL,
+    title TEXT NOT NULL,
+    text TEXT NOT NULL,
+    ingredients TEXT NOT NULL,
+    diets TEXT NOT NULL,
+    prep_minutes INTEGER,
+    source TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recipes_phone_prep ON recipes (phone, prep_minutes);
+CREATE TABLE IF NOT EXISTS recipe_ingredients (
+    ingredient TEXT NOT NULL,
+    recipe_id INTEGER NOT NULL,
+    PRIMARY KEY (ingredient, recipe_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS recipe_diets (
+    diet TEXT NOT NULL,
+    recipe_id INTEGER NOT NULL,
+    PRIMARY KEY (diet, recipe_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS recipe_bands (
+    phone TEXT NOT NULL,
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    recipe_id INTEGER NOT NULL,
+    PRIMARY KEY (phone, band, bucket, recipe_id)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+    title, ingredients, text, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_WORD_PATTERN = re.compile(r"[^\W\d_]+")
+_BULLET_PATTERN = re.compile(r"^[-•*]\s+(.+)$")
+_HEADING_PATTERN = re.compile(r"^(#+\s+.+|\*\*[^*]+\*\*:?)$")
+_MINUTES_PATTERN = re.compile(r"(\d+)\s*(?:min|minutes|mn)\b", re.IGNORECASE)
+_TIME_LINE_PATTERN = re.compile(r"\b(prep|cook|total|time|temps|préparation|cuisson)\b", re.IGNORECASE)
+_MAX_PREP_PATTERN = re.compile(
+    r"\b(?:under|less than|within|moins de|en)\s*(\d+)\s*(?:min|minutes|mn)\b", re.IGNORECASE
+)
+_QUICK_PATTERN = re.compile(r"\b(quick|fast|rapides?)\b", re.IGNORECASE)
+_WITH_PATTERN = re.compile(r"\b(?:with|avec)\s+([^\W\d_]+)", re.IGNORECASE)
+_LIBRARY_QUERY_PATTERN = re.compile(
+    r"^\W*(?:(?:can|could) you\s+|please\s+)?"
+    r"(?:show|list|find|browse|see|montre|affiche|liste|trouve|cherche)\b.*\b(?:recipes?|recettes?)\b",
+    re.IGNORECASE,
+)
+_STOPWORDS = set(RECIPE_STOPWORDS)
+_UNITS = set(RECIPE_UNITS)
+_DIET_PATTERNS = {
+    diet: re.compile(r"\b(" + "|".join(re.escape(k) for k in keywords) + r")\b", re.IGNORECASE)
+    for diet, keywords in RECIPE_DIET_KEYWORDS.items()
+}
+
+
+def _stem(word: str) -> str:
+    """Crude plural stripping so "tomatoes" finds "tomato" by prefix."""
+    if len(word) > 4 and word.endswith("es"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def _clean_line(line: str) -> str:
+    """Strip markdown, emojis and punctuation around a line."""
+    return re.sub(r"^[^\w]+|[^\w)]+$", "", line.replace("**", "")).strip()
+
+
+def normalize_ingredient(raw: str) -> str:
+    """Reduce an ingredient line to its food words ("200g spaghetti" -> "spaghetti")."""
+    words = [
+        word.lower()
+        for word in _WORD_PATTERN.findall(raw)
+        if word.lower() not in _UNITS and word.lower() not in _STOPWORDS and len(word) > 2
+    ]
+    return " ".join(words)
+
+
+def detect_diets(text: str) -> list[str]:
+    """Return the diet tags mentioned in a text."""
+    diets = [diet for diet, pattern in _DIET_PATTERNS.items() if pattern.search(text)]
+    if "vegan" in diets and "vegetarian" not in diets:
+        diets.append("vegetarian")
+    return sorted(diets)
+
+
+def parse_recipe_text(text: str, source: str = "user") -> Recipe:
+    """
+    Parse free recipe text into a Recipe.
+
+    The title is the first heading-like line (or the first line), bullet
+    lines are ingredients and prep time is read from time lines.
+    """
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    heading = next((line for line in lines if _HEADING_PATTERN.match(line)), None)
+    title = _clean_line(heading or (lines[0] if lines else "")) or "Untitled recipe"
+
+    ingredients = []
+    for line in lines:
+        match = _BULLET_PATTERN.match(line)
+        if match and (ingredient := normalize_ingredient(match.group(1))):
+            ingredients.append(ingredient)
+
+    minutes = [
+        int(value)
+        for line in lines
+        if _TIME_LINE_PATTERN.search(line)
+        for value in _MINUTES_PATTERN.findall(line)
+    ]
+    total = next(
+        (
+            int(value)
+            for line in lines
+            if re.search(r"\btotal\b", line, re.IGNORECASE)
+            for value in _MINUTES_PATTERN.findall(line)
+        ),
+        None,
+    )
+
+    return Recipe(
+        title=title,
+        text=text.strip(),
+        ingredients=ingredients,
+        diets=detect_diets(text),
+        prep_minutes=total if total is not None else (sum(minutes) or None),
+        source=source,
+    )
+
+
+def parse_save_command(text: str) -> str | None:
+    """Return the recipe text if the message asks to save a recipe, else None."""
+    stripped = text.strip()
+    for prefix in SAVE_RECIPE_COMMAND_PREFIXES:
+        if stripped.lower().startswith(prefix):
+            return stripped[len(prefix):].strip()
+    return None
+
+
+def is_library_query(text: str) -> bool:
+    """Whether the message explicitly asks to browse the user's saved recipes."""
+    return bool(_LIBRARY_QUERY_PATTERN.search(text))
+
+
+def parse_library_query(text: str) -> RecipeQuery:
+    """Parse search terms and attribute filters from a library request."""
+    diets = detect_diets(text)
+    max_prep = None
+    if match := _MAX_PREP_PATTERN.search(text):
+        max_prep = int(match.group(1))
+    elif _QUICK_PATTERN.search(text):
+        max_prep = RECIPE_QUICK_PREP_MINUTES
+
+    ingredients = [normalize_ingredient(word) for word in _WITH_PATTERN.findall(text)]
+    ingredients = [ingredient for ingredient in ingredients if ingredient]
+
+    remaining = text
+    for pattern in _DIET_PATTERNS.values():
+        remaining = pattern.sub(" ", remaining)
+    terms = [
+        _stem(word.lower())
+        for word in _WORD_PATTERN.findall(remaining)
+        if word.lower() not in _STOPWORDS and word.lower() not in ingredients and len(word) > 2
+    ]
+
+    return RecipeQuery(
+        terms=terms,
+        ingredients=ingredients,
+        diet=diets[0] if diets else None,
+        max_prep_minutes=max_prep,
+    )
+
+
+def format_recipe_list(recipes: list[Recipe]) -> str:
+    """Format search results as a WhatsApp reply; a single hit is shown in full."""
+    if len(recipes) == 1:
+        return recipes[0].text
+    lines = ["📖 Your recipes:"]
+    for index, recipe in enumerate(recipes, start=1):
+        prep = f" ({recipe.prep_minutes} min)" if recipe.prep_minutes else ""
+        lines.append(f"{index}. {recipe.title}{prep}")
+    return "\n".join(lines)
+
+
+class RecipeLibrary:
+    """Per-user recipe storage with full-text and attribute search."""
+
+    def __init__(self, path: str | None = None) -> None:
+        """Initialize the library; the database is opened on first use."""
+        self.path = path or settings.sqlite_path
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Open the database and create tables on first access."""
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _to_recipe(row: sqlite3.Row) -> Recipe:
+        """Build a Recipe from a recipes row."""
+        return Recipe(
+            id=row["id"],
+            title=row["title"],
+            text=row["text"],
+            ingredients=json.loads(row["ingredients"]),
+            diets=json.loads(row["diets"]),
+            prep_minutes=row["prep_minutes"],
+            source=row["source"],
+        )
+
+    def find_duplicate(self, phone: str, signature: list[int], source: str = "user") -> Recipe | None:
+        """
+        Return a near-duplicate of a signature among the user's recipes from a source.
+
+        Candidates share at least one LSH band and are confirmed by
+        their estimated Jaccard similarity.
+        """
+        buckets = minhash.bands(signature)
+        clauses = " OR ".join("(band = ? AND bucket = ?)" for _ in buckets)
+        params = [value for band, bucket in enumerate(buckets) for value in (band, bucket)]
+        rows = self.conn.execute(
+            f"""
+            SELECT * FROM recipes WHERE source = ? AND id IN (
+                SELECT recipe_id FROM recipe_bands WHERE phone = ? AND ({clauses})
+            )
+            """,
+            [source, phone, *params],
+        ).fetchall()
+        for row in rows:
+            if minhash.similarity(signature, json.loads(row["signature"])) >= RECIPE_DUPLICATE_THRESHOLD:
+                return self._to_recipe(row)
+        return None
+
+    def save(self, phone: str, recipe: Recipe) -> tuple[Recipe, bool]:
+        """
+        Save a recipe unless a near-duplicate is already stored.
+
+        Returns:
+            The stored recipe and whether it was newly created
+        """
+        signature = minhash.signature(f"{recipe.title} {recipe.text}")
+        if (existing := self.find_duplicate(phone, signature, recipe.source)) is not None:
+            logger.info(f"Recipe '{recipe.title}' duplicates #{existing.id} for {phone}")
+            return existing, False
+
+        cursor = self.conn.execute(
+            """
+            INSERT INTO recipes
+                (phone, title, text, ingredients, diets, prep_minutes, source, signature, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                phone,
+                recipe.title,
+                recipe.text,
+                json.dumps(recipe.ingredients),
+                json.dumps(recipe.diets),
+                recipe.prep_minutes,
+                recipe.source,
+                json.dumps(signature),
+                datetime.now(UTC).isoformat(),
+            ),
+        )
+        recipe_id = cursor.lastrowid
+        words = {word for ingredient in recipe.ingredients for word in ingredient.split()}
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO recipe_ingredients (ingredient, recipe_id) VALUES (?, ?)",
+            [(_stem(word), recipe_id) for word in words],
+        )
+        self.conn.executemany(
+            "INSERT INTO recipe_diets (diet, recipe_id) VALUES (?, ?)",
+            [(diet, recipe_id) for diet in recipe.diets],
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO recipe_bands (phone, band, bucket, recipe_id) VALUES (?, ?, ?, ?)",
+            [(phone, band, bucket, recipe_id) for band, bucket in enumerate(minhash.bands(signature))],
+        )
+        self.conn.execute(
+            "INSERT INTO recipes_fts (rowid, title, ingredients, text) VALUES (?, ?, ?, ?)",
+            (recipe_id, recipe.title, " ".join(recipe.ingredients), recipe.text),
+        )
+        self.conn.commit()
+        return recipe.model_copy(update={"id": recipe_id}), True
+
+    def search(
+        self,
+        phone: str,
+        query: RecipeQuery,
+        limit: int = RECIPE_SEARCH_LIMIT,
+        match_any: bool = False,
+        include_generated: bool = False,
+    ) -> list[Recipe]:
+        """
+        Search a user's recipes.
+
+        Args:
+            phone: User phone number
+            query: Full-text terms and attribute filters
+            limit: Maximum number of results
+            match_any: Match any term (ranked) instead of all terms
+            include_generated: Also match cached LLM-generated recipes
+
+        Returns:
+            Matching recipes, best first
+        """
+        sql = ["SELECT r.* FROM recipes r"]
+        params: list = []
+        if query.terms:
+            operator = " OR " if match_any else " "
+            sql.append("JOIN recipes_fts f ON f.rowid = r.id AND recipes_fts MATCH ?")
+            params.append(operator.join(f'"{term}"*' for term in query.terms))
+
+        sql.append("WHERE r.phone = ?")
+        params.append(phone)
+        if not include_generated:
+            sql.append("AND r.source = 'user'")
+        if query.max_prep_minutes is not None:
+            sql.append("AND r.prep_minutes <= ?")
+            params.append(query.max_prep_minutes)
+        if query.diet:
+            sql.append("AND r.id IN (SELECT recipe_id FROM recipe_diets WHERE diet = ?)")
+            params.append(query.diet)
+        for ingredient in query.ingredients:
+            for word in ingredient.split():
+                sql.append("AND r.id IN (SELECT recipe_id FROM recipe_ingredients WHERE ingredient = ?)")
+                params.append(_stem(word))
+
+        sql.append("ORDER BY bm25(recipes_fts)" if query.terms else "ORDER BY r.id DESC")
+        sql.append("LIMIT ?")
+        params.append(limit)
+
+        rows = self.conn.execute("\n".join(sql), params).fetchall()
+        return [self._to_recipe(row) for row in rows]
+
+    def find_exact(self, phone: str, text: str) -> Recipe | None:
+        """
+        Return a saved or cached recipe that answers a recipe request.
+
+        A saved recipe matches when its title words all appear in the
+        message and it passes the message's diet, prep-time and ingredient
+        filters. A cached generated recipe only matches a message asking
+        for exactly its title, with no filter.
+        """
+        query = parse_library_query(text)
+        if not query.terms:
+            return None
+        words = set(query.terms)
+        has_filters = bool(query.diet or query.max_prep_minutes is not None or query.ingredients)
+        recipes = self.search(phone, query, match_any=True, include_generated=not has_filters)
+        for recipe in recipes:
+            title_words = {
+                _stem(word.lower())
+                for word in _WORD_PATTERN.findall(recipe.title)
+                if word.lower() not in _STOPWORDS and len(word) > 2
+            }
+            if not title_words:
+                continue
+            if recipe.source == "generated" and title_words == words:
+                return recipe
+            if recipe.source != "generated" and title_words <= words:
+                return recipe
+        return None
+
+    def grounding_context(self, phone: str, text: str) -> str:
+        """
+        Return the user's most relevant saved recipes as compact LLM context.
+
+        Returns:
+            One line per recipe (title, prep time, ingredients), or ""
+        """
+        query = parse_library_query(text)
+        terms = query.terms + [_stem(word) for item in query.ingredients for word in item.split()]
+        if not terms:
+            return ""
+        recipes = self.search(
+            phone, RecipeQuery(terms=terms), limit=RECIPE_GROUNDING_LIMIT, match_any=True
+        )
+        lines = []
+        for recipe in recipes:
+            prep = f", {recipe.prep_minutes} min" if recipe.prep_minutes else ""
+            lines.append(f"- {recipe.title}{prep}: {', '.join(recipe.ingredients)}")
+        return "\n".join(lines)[:RECIPE_GROUNDING_MAX_CHARS]
+
+    def answer(self, phone: str, text: str) -> str | None:
+        """
+        Answer a message from the library without the LLM when possible.
+
+        Handles "save recipe:" commands, browsing requests such as "show my
+        pasta recipes" and recipe requests matching a saved recipe's title.
+        Browsing requests that find nothing are left to the LLM.
+
+        Returns:
+            Reply text, or None if the LLM is needed
+        """
+        if (recipe_text := parse_save_command(text)) is not None:
+            recipe, created = self.save(phone, parse_recipe_text(recipe_text))
+            message = RECIPE_SAVED_MESSAGE if created else RECIPE_DUPLICATE_MESSAGE
+            return message.format(title=recipe.title)
+
+        if is_library_query(text) and (recipes := self.search(phone, parse_library_query(text))):
+            return format_recipe_list(recipes)
+
+        if detect_request_type(text) == "recipe" and (recipe := self.find_exact(phone, text)):
+            logger.info(f"Serving saved recipe #{recipe.id} for {phone}")
+            return recipe.text
+
+        return None
+
+    def save_generated(self, phone: str, text: str) -> None:
+        """Cache an LLM-generated recipe so it is not generated again; it is never listed."""
+        recipe = parse_recipe_text(text, source="generated")
+        if len(recipe.ingredients) >= 2:
+            self.save(phone, recipe)
+
+
+# Global instance
+recipe_library = RecipeLibrary()
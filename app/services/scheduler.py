@@ -0,0 +1,84 @@
+"""Weighted fair queuing of LLM requests across tenants."""
+
+import asyncio
+import heapq
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from app.core.constants import LLM_SCHEDULER_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+class FairScheduler:
+    """
+    Limit concurrent LLM requests and share the slots fairly between tenants.
+
+    Each request gets a virtual finish time, its cost divided by its
+    tenant's weight added to the later of the tenant's previous finish
+    time and the current virtual time. When a slot frees up, the waiting
+    request with the earliest finish time runs next, so a tenant flooding
+    the queue only delays its own requests.
+    """
+
+    def __init__(self, concurrency: int = LLM_SCHEDULER_CONCURRENCY) -> None:
+        """Initialize an idle scheduler."""
+        self.concurrency = concurrency
+        self.active = 0
+        self._virtual_time = 0.0
+        self._last_finish: dict[str, float] = {}
+        self._waiting: list[tuple[float, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests queued for a slot."""
+        return sum(1 for _, _, future in self._waiting if not future.done())
+
+    @asynccontextmanager
+    async def slot(self, tenant: str, weight: float = 1.0, cost: float = 1.0) -> AsyncIterator[None]:
+        """
+        Wait for this tenant's turn, then hold a slot for the block.
+
+        Args:
+            tenant: Tenant key
+            weight: Tenant share relative to the others
+            cost: Request size (e.g. its max_tokens)
+        """
+        start = max(self._virtual_time, self._last_finish.get(tenant, 0.0))
+        finish = start + cost / weight
+        self._last_finish[tenant] = finish
+
+        if self.active < self.concurrency and not self._waiting:
+            self.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiting, (finish, next(self._sequence), future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                # The slot may have been handed over just before cancellation
+                if future.done() and not future.cancelled():
+                    self._release()
+                raise
+
+        self._virtual_time = max(self._virtual_time, start)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        """Hand the freed slot to the earliest waiting request."""
+        while self._waiting:
+            _, _, future = heapq.heappop(self._waiting)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+# Global instance
+llm_scheduler = FairScheduler()
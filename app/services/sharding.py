@@ -0,0 +1,246 @@
+"""Sender-affinity sharding: route each WhatsApp user to one owning worker."""
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import secrets
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+
+from app.core.config import settings
+from app.core.constants import (
+    SHARD_FORWARD_TIMEOUT_SECONDS,
+    SHARD_INTERNAL_WEBHOOK_PATH,
+    SHARD_PROBE_INTERVAL_SECONDS,
+    SHARD_SECRET_HEADER,
+    SHARD_VIRTUAL_NODES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(key: str) -> int:
+    """Map a key to a point on the ring."""
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+def parse_members(spec: str) -> dict[str, str]:
+    """
+    Parse a "node_id=address,..." membership spec.
+
+    Returns:
+        Mapping of node id to address
+    """
+    members = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        node_id, _, address = item.partition("=")
+        members[node_id.strip()] = address.strip()
+    return members
+
+
+class ConsistentHashRing:
+    """Consistent hash ring with virtual nodes."""
+
+    def __init__(self, nodes: list[str], virtual_nodes: int = SHARD_VIRTUAL_NODES) -> None:
+        """Build the ring for the given nodes."""
+        self.virtual_nodes = virtual_nodes
+        self._points: list[int] = []
+        self._owners: list[str] = []
+        self.rebuild(nodes)
+
+    def rebuild(self, nodes: list[str]) -> None:
+        """Rebuild the ring for a new node set."""
+        ring = sorted(
+            (_hash(f"{node}#{replica}"), node)
+            for node in nodes
+            for replica in range(self.virtual_nodes)
+        )
+        self._points = [point for point, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    def owner(self, key: str) -> str | None:
+        """Return the node owning a key, or None if the ring is empty."""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+class ShardRouter:
+    """Route messages to their owning node and serialize work per sender."""
+
+    def __init__(
+        self,
+        node_id: str | None = None,
+        members: dict[str, str] | None = None,
+        secret: str | None = None,
+    ) -> None:
+        """Initialize the router from settings unless overridden."""
+        self.node_id = node_id if node_id is not None else settings.shard_node_id
+        self.members = members if members is not None else parse_members(settings.shard_members)
+        self.secret = secret if secret is not None else settings.shard_secret
+        self.alive = set(self.members)
+        self.ring = ConsistentHashRing(sorted(self.alive))
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._waiters: dict[str, int] = defaultdict(int)
+        self._probe_task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether sharding is configured with this node as a member."""
+        return bool(self.node_id) and self.node_id in self.members and len(self.members) > 1
+
+    def owner(self, sender: str) -> str:
+        """Return the node that owns a sender's messages."""
+        if not self.enabled:
+            return self.node_id
+        return self.ring.owner(sender) or self.node_id
+
+    def is_local(self, sender: str) -> bool:
+        """Whether this node owns the sender."""
+        return self.owner(sender) == self.node_id
+
+    def set_alive(self, alive: set[str]) -> None:
+        """Update live membership and rebalance the ring if it changed."""
+        alive = (alive & set(self.members)) | {self.node_id}
+        if alive == self.alive:
+            return
+        logger.warning(f"Shard membership changed: {sorted(self.alive)} -> {sorted(alive)}")
+        self.alive = alive
+        self.ring.rebuild(sorted(alive))
+
+    def check_secret(self, secret: str | None) -> bool:
+        """Validate the shared secret on a forwarded request (in constant time)."""
+        if not self.secret or secret is None:
+            return False
+        return secrets.compare_digest(secret.encode(), self.secret.encode())
+
+    def _client(self, node_id: str) -> httpx.AsyncClient:
+        """Return a pooled client for a peer, over a Unix socket or HTTP."""
+        if node_id not in self._clients:
+            address = self.members[node_id]
+            if address.startswith("unix:"):
+                transport = httpx.AsyncHTTPTransport(uds=address.removeprefix("unix:"))
+                client = httpx.AsyncClient(
+                    transport=transport, base_url="http://shard", timeout=SHARD_FORWARD_TIMEOUT_SECONDS
+                )
+            else:
+                client = httpx.AsyncClient(base_url=address, timeout=SHARD_FORWARD_TIMEOUT_SECONDS)
+            self._clients[node_id] = client
+        return self._clients[node_id]
+
+    async def forward(self, node_id: str, message: dict, value: dict) -> bool:
+        """
+        Forward one message to its owning node.
+
+        Args:
+            node_id: Owning node
+            message: Message data from webhook
+            value: Value object the message came in (metadata is kept)
+
+        Returns:
+            True if the owner accepted it (or may have), False if it must be
+            handled locally
+        """
+        context = {key: item for key, item in value.items() if key not in ("messages", "statuses")}
+        body = {
+            "object": "whatsapp_business_account",
+            "entry": [{"changes": [{"value": {**context, "messages": [message]}}]}],
+        }
+        try:
+            response = await self._client(node_id).post(
+                SHARD_INTERNAL_WEBHOOK_PATH,
+                json=body,
+                headers={SHARD_SECRET_HEADER: self.secret},
+            )
+            response.raise_for_status()
+            logger.info(f"Forwarded message {message.get('id')} to {node_id}")
+            return True
+        except httpx.ReadTimeout:
+            # The request went out; the owner may well be processing it, so
+            # handling it here too could send the user two replies
+            logger.warning(f"No acknowledgement from {node_id} for message {message.get('id')}")
+            return True
+        except httpx.HTTPStatusError as e:
+            logger.error(f"{node_id} rejected message {message.get('id')}: {e}")
+            return False
+        except httpx.TransportError as e:
+            logger.error(f"Failed to forward message to {node_id}: {e}")
+            self.set_alive(self.alive - {node_id})
+            return False
+
+    async def route(self, message: dict, value: dict) -> bool:
+        """
+        Forward a message if another node owns its sender.
+
+        Returns:
+            True if the message was handed off and must not be processed here
+        """
+        sender = message.get("from", "")
+        owner = self.owner(sender)
+        if owner == self.node_id:
+            return False
+        return await self.forward(owner, message, value)
+
+    @asynccontextmanager
+    async def sender_lock(self, sender: str) -> AsyncIterator[None]:
+        """Process one sender's messages one at a time, in arrival order."""
+        self._waiters[sender] += 1
+        try:
+            async with self._locks[sender]:
+                yield
+        finally:
+            self._waiters[sender] -= 1
+            if self._waiters[sender] == 0:
+                del self._waiters[sender]
+                del self._locks[sender]
+
+    async def probe(self) -> None:
+        """Check peer health once and rebalance on membership changes."""
+        alive = {self.node_id}
+        for node_id in self.members:
+            if node_id == self.node_id:
+                continue
+            try:
+                response = await self._client(node_id).get("/health", timeout=2.0)
+                if response.is_success:
+                    alive.add(node_id)
+            except httpx.HTTPError:
+                pass
+        self.set_alive(alive)
+
+    async def _probe_loop(self) -> None:
+        """Probe peers periodically."""
+        while True:
+            await asyncio.sleep(SHARD_PROBE_INTERVAL_SECONDS)
+            await self.probe()
+
+    def start(self) -> None:
+        """Start membership probing if sharding is enabled."""
+        if self.enabled and self._probe_task is None:
+            logger.info(f"Sharding enabled: node {self.node_id} of {sorted(self.members)}")
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self) -> None:
+        """Stop probing and close peer connections."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+# Global instance
+shard_router = ShardRouter()
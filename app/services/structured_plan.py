@@ -0,0 +1,142 @@
+"""JSON schema, incremental parsing and validation for structured meal plans."""
+
+import json
+import logging
+import re
+from typing import Any
+
+from app.core.constants import MEAL_PLAN_TOKENS_OVERHEAD, MEAL_PLAN_TOKENS_PER_DAY, MEAL_TYPES
+from app.models.meal_plan import DayPlan
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+
+
+def meal_plan_schema(days: list[str]) -> dict[str, Any]:
+    """Return the JSON schema for a plan covering `days` x MEAL_TYPES."""
+    day_properties = {"day": {"type": "string", "enum": days}}
+    day_properties.update({meal_type: {"type": "string"} for meal_type in MEAL_TYPES})
+    return {
+        "type": "object",
+        "properties": {
+            "days": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": day_properties,
+                    "required": ["day", *MEAL_TYPES],
+                    "additionalProperties": False,
+                },
+            }
+        },
+        "required": ["days"],
+        "additionalProperties": False,
+    }
+
+
+def meal_plan_max_tokens(day_count: int) -> int:
+    """Return the max_tokens requested for a plan covering `day_count` days."""
+    return MEAL_PLAN_TOKENS_OVERHEAD + MEAL_PLAN_TOKENS_PER_DAY * day_count
+
+
+def meal_plan_response_format(days: list[str]) -> dict[str, Any]:
+    """Return the OpenRouter response_format for a structured meal plan."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": "meal_plan", "strict": True, "schema": meal_plan_schema(days)},
+    }
+
+
+class IncrementalDayParser:
+    """
+    Extract completed day objects from a streamed meal plan JSON document.
+
+    Accepts {"days": [{...}, ...]} or a bare [{...}, ...]; anything outside
+    the JSON (such as markdown fences) is ignored. Each character is
+    scanned once, so feeding is linear in the total output.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty parser."""
+        self._buffer = ""
+        self._pos = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._object_start: int | None = None
+
+    def _is_day_level(self) -> bool:
+        """Whether the parser is directly inside the days array."""
+        return self._stack in (["{", "["], ["["])
+
+    def feed(self, chunk: str) -> list[str]:
+        """
+        Add streamed text and return the raw JSON of days completed by it.
+
+        Args:
+            chunk: Next piece of the model output
+
+        Returns:
+            JSON texts of day objects that closed in this chunk
+        """
+        self._buffer += chunk
+        completed = []
+        while self._pos < len(self._buffer):
+            char = self._buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"' and self._stack:
+                self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._is_day_level():
+                    self._object_start = self._pos
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._is_day_level() and self._object_start is not None:
+                    completed.append(self._buffer[self._object_start:self._pos + 1])
+                    self._object_start = None
+            self._pos += 1
+        return completed
+
+
+def parse_day(raw: str, expected_days: list[str]) -> DayPlan | None:
+    """
+    Parse and validate one day object.
+
+    Trailing commas are repaired; days outside `expected_days` or with a
+    missing or empty meal are rejected.
+
+    Returns:
+        The validated day, or None if it must be regenerated
+    """
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        try:
+            data = json.loads(_TRAILING_COMMA_PATTERN.sub(r"\1", raw))
+        except json.JSONDecodeError:
+            logger.warning(f"Unparseable day object: {raw[:100]}")
+            return None
+
+    if not isinstance(data, dict):
+        return None
+    day = str(data.get("day", "")).strip().lower()
+    if day not in expected_days:
+        logger.warning(f"Unexpected day in meal plan: {day!r}")
+        return None
+
+    meals = {}
+    for meal_type in MEAL_TYPES:
+        dish = data.get(meal_type)
+        if not isinstance(dish, str) or not dish.strip():
+            logger.warning(f"Missing {meal_type} for {day}")
+            return None
+        meals[meal_type] = dish.strip()
+    return DayPlan(day=day, meals=meals)
@@ -0,0 +1,137 @@
+"""WhatsApp business numbers served by this deployment."""
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import httpx
+
+from app.core.config import TenantConfig, settings
+from app.core.constants import (
+    TENANT_MAX_CONNECTIONS,
+    TENANT_SEND_TIMEOUT_SECONDS,
+    WHATSAPP_API_BASE_URL,
+    WHATSAPP_API_VERSION,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Rate limiter allowing `rate` operations per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        """Add the tokens earned since the last update."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Take one token, waiting for it if the budget is spent."""
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+@dataclass
+class Tenant:
+    """A business number with its credentials, budgets and connection pool."""
+
+    config: TenantConfig
+    send_budget: TokenBucket = field(init=False)
+    llm_budget: TokenBucket = field(init=False)
+    _client: httpx.AsyncClient | None = field(default=None, init=False)
+
+    def __post_init__(self) -> None:
+        """Create the rate-limit budgets."""
+        self.send_budget = TokenBucket(self.config.send_per_second, self.config.send_per_second)
+        per_minute = self.config.llm_requests_per_minute
+        self.llm_budget = TokenBucket(per_minute / 60, per_minute)
+
+    @property
+    def key(self) -> str:
+        """Tenant key, its phone number ID."""
+        return self.config.phone_number_id
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled client for the Cloud API, authenticated as this number."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=f"{WHATSAPP_API_BASE_URL}/{WHATSAPP_API_VERSION}/{self.key}",
+                headers={"Authorization": f"Bearer {self.config.access_token}"},
+                limits=httpx.Limits(max_connections=TENANT_MAX_CONNECTIONS),
+                timeout=TENANT_SEND_TIMEOUT_SECONDS,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class TenantRegistry:
+    """Resolve webhook values to the business number they were sent to."""
+
+    def __init__(self, configs: list[TenantConfig], default_id: str) -> None:
+        """Index tenants by phone number ID."""
+        self.tenants = {config.phone_number_id: Tenant(config) for config in configs}
+        self.default = self.tenants[default_id]
+
+    @classmethod
+    def from_settings(cls) -> "TenantRegistry":
+        """Build the registry from the default number and WHATSAPP_TENANTS."""
+        default = TenantConfig(
+            phone_number_id=settings.whatsapp_phone_number_id,
+            access_token=settings.whatsapp_access_token,
+        )
+        configs = [default] + [
+            config
+            for config in settings.whatsapp_tenants
+            if config.phone_number_id != default.phone_number_id
+        ]
+        return cls(configs, default.phone_number_id)
+
+    def resolve(self, value: dict) -> Tenant:
+        """
+        Return the tenant a webhook value belongs to.
+
+        Values without metadata, or for an unknown number, go to the default tenant.
+        """
+        phone_number_id = value.get("metadata", {}).get("phone_number_id")
+        if phone_number_id is None:
+            return self.default
+        tenant = self.tenants.get(phone_number_id)
+        if tenant is None:
+            logger.warning(f"Unknown phone number ID {phone_number_id}, using default tenant")
+            return self.default
+        return tenant
+
+    def current(self) -> Tenant:
+        """Return the tenant of the message being processed."""
+        return current_tenant.get() or self.default
+
+    async def close(self) -> None:
+        """Close every tenant's connection pool."""
+        for tenant in self.tenants.values():
+            await tenant.close()
+
+
+# Tenant of the message being processed; copied into tasks it spawns
+current_tenant: ContextVar[Tenant | None] = ContextVar("current_tenant", default=None)
+
+# Global instance
+tenant_registry = TenantRegistry.from_settings()
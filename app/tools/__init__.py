@@ -0,0 +1 @@
+"""Command-line tools for operating and testing the bot."""
@@ -0,0 +1,390 @@
+"""
+Benchmark LLM models and settings on a corpus of representative messages.
+
+Usage:
+    # Offline, against recorded responses (CI)
+    python -m app.tools.benchmark --recorded benchmarks/recorded.jsonl --no-latency
+
+    # Against OpenRouter, saving responses for later offline runs
+    python -m app.tools.benchmark --model qwen/qwen3.5-plus-02-15 --model other/model \\
+        --reasoning off on --record benchmarks/recorded.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import statistics
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import httpx
+
+from app.core.config import TenantConfig
+from app.core.constants import (
+    BENCHMARK_CORPUS_PATH,
+    BENCHMARK_LLM_REQUESTS_PER_MINUTE,
+    BENCHMARK_STREAM_CHUNKS,
+    DEFAULT_LLM_MODEL,
+    DEFAULT_LLM_TEMPERATURE,
+)
+from app.models.llm import LLMCompletion
+from app.services.llm import OpenRouterService
+from app.services.tenants import Tenant, current_tenant
+
+logger = logging.getLogger(__name__)
+
+
+def load_jsonl(path: Path) -> list[dict[str, Any]]:
+    """Load the records of a JSONL file."""
+    with path.open(encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _last_user_message(messages: list[dict[str, str]]) -> str:
+    """Return the last user message content."""
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return message.get("content", "")
+    return ""
+
+
+def _sse(data: dict[str, Any] | str) -> bytes:
+    """Encode one server-sent event."""
+    text = data if isinstance(data, str) else json.dumps(data)
+    return f"data: {text}\n\n".encode()
+
+
+class _RecordedStream(httpx.AsyncByteStream):
+    """SSE body replaying one recorded response at its recorded pace."""
+
+    def __init__(self, recording: dict[str, Any], simulate_latency: bool) -> None:
+        """Store the recording to stream."""
+        self.recording = recording
+        self.simulate_latency = simulate_latency
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        """Yield the content in chunks, then usage and [DONE]."""
+        content = self.recording["content"]
+        size = max(1, math.ceil(len(content) / BENCHMARK_STREAM_CHUNKS))
+        chunks = [content[i:i + size] for i in range(0, len(content), size)]
+        ttft = self.recording["ttft_ms"] / 1000
+        gap = max(0.0, self.recording["duration_ms"] / 1000 - ttft) / max(1, len(chunks) - 1)
+
+        for index, chunk in enumerate(chunks):
+            if self.simulate_latency:
+                await asyncio.sleep(ttft if index == 0 else gap)
+            yield _sse({"choices": [{"delta": {"content": chunk}}]})
+        yield _sse(
+            {
+                "choices": [{"delta": {}, "finish_reason": self.recording.get("finish_reason", "stop")}],
+                "usage": self.recording["usage"],
+            }
+        )
+        yield _sse("[DONE]")
+
+
+class RecordedTransport(httpx.AsyncBaseTransport):
+    """Stand-in for the OpenRouter API streaming recorded responses."""
+
+    def __init__(self, recordings: list[dict[str, Any]], simulate_latency: bool = True) -> None:
+        """Index recordings by model, reasoning mode and user message."""
+        self.simulate_latency = simulate_latency
+        self.recordings = {
+            (recording["model"], recording["reasoning"], recording["message"]): recording
+            for recording in recordings
+        }
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Answer a chat completion request from the recordings (404 if unrecorded)."""
+        payload = json.loads(request.content)
+        key = (
+            payload["model"],
+            payload["reasoning"]["enabled"],
+            _last_user_message(payload["messages"]),
+        )
+        recording = self.recordings.get(key)
+        if recording is None:
+            return httpx.Response(404, json={"error": {"message": "Not recorded"}}, request=request)
+        return httpx.Response(
+            200,
+            headers={"Content-Type": "text/event-stream"},
+            stream=_RecordedStream(recording, self.simulate_latency),
+            request=request,
+        )
+
+
+async def measure(
+    service: OpenRouterService,
+    item: dict[str, Any],
+    model: str,
+    reasoning: bool,
+    temperature: float = DEFAULT_LLM_TEMPERATURE,
+    max_tokens: int | None = None,
+) -> dict[str, Any]:
+    """
+    Run one corpus message through the service and time it.
+
+    Messages and max_tokens are built as for a WhatsApp reply
+    (generate_meal_plan_completion), streamed so the first token can be
+    timed. Continuations of truncated replies are not run.
+
+    Returns:
+        Run metrics, or the error if the request failed
+    """
+    message = item["message"]
+    messages, budget = service.meal_plan_request(message)
+    run: dict[str, Any] = {
+        "id": item["id"],
+        "message": message,
+        "request_type": budget.request_type,
+        "model": model,
+        "reasoning": reasoning,
+    }
+
+    completions: list[LLMCompletion] = []
+    ttft_ms = None
+    started = time.perf_counter()
+    try:
+        async for _ in service.stream_completion(
+            messages,
+            model=model,
+            max_tokens=max_tokens or budget.max_tokens,
+            temperature=temperature,
+            reasoning=reasoning,
+            on_complete=completions.append,
+        ):
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started) * 1000
+    except (httpx.HTTPError, ValueError, RuntimeError) as e:
+        # ValueError covers malformed server-sent events (json.JSONDecodeError)
+        run["error"] = f"{type(e).__name__}: {e}"
+        return run
+
+    usage = completions[0].usage
+    run.update(
+        {
+            "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            "prompt_tokens": usage.prompt_tokens,
+            "output_tokens": usage.completion_tokens,
+            "reasoning_tokens": usage.reasoning_tokens,
+            "cost": usage.cost,
+            "finish_reason": completions[0].finish_reason,
+            "content": completions[0].content,
+        }
+    )
+    return run
+
+
+async def run_benchmark(
+    service: OpenRouterService,
+    corpus: list[dict[str, Any]],
+    models: list[str],
+    reasoning_modes: list[bool],
+    repeat: int = 1,
+    temperature: float = DEFAULT_LLM_TEMPERATURE,
+    max_tokens: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Run every corpus message for each model and reasoning mode, one at a time.
+
+    Runs use their own tenant so the production LLM budget does not
+    throttle (and skew) the measurements.
+
+    Returns:
+        One result per run
+    """
+    tenant = Tenant(
+        TenantConfig(
+            phone_number_id="benchmark",
+            access_token="",
+            llm_requests_per_minute=BENCHMARK_LLM_REQUESTS_PER_MINUTE,
+        )
+    )
+    token = current_tenant.set(tenant)
+    try:
+        runs = []
+        for model in models:
+            for reasoning in reasoning_modes:
+                for item in corpus:
+                    for _ in range(repeat):
+                        runs.append(
+                            await measure(service, item, model, reasoning, temperature, max_tokens)
+                        )
+        return runs
+    finally:
+        current_tenant.reset(token)
+
+
+def _percentile(values: list[float], fraction: float) -> float | None:
+    """Nearest-rank percentile, None for no values."""
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[int(fraction * (len(values) - 1))], 1)
+
+
+def summarize(runs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Aggregate runs per model and reasoning mode."""
+    groups: dict[tuple[str, bool], list[dict[str, Any]]] = {}
+    for run in runs:
+        groups.setdefault((run["model"], run["reasoning"]), []).append(run)
+
+    summary = []
+    for (model, reasoning), group in groups.items():
+        ok = [run for run in group if "error" not in run]
+        ttft = [run["ttft_ms"] for run in ok if run["ttft_ms"] is not None]
+        total = [run["total_ms"] for run in ok]
+        output_tokens = sum(run["output_tokens"] for run in ok)
+        reasoning_tokens = sum(run["reasoning_tokens"] for run in ok)
+        costs = [run["cost"] for run in ok if run["cost"] is not None]
+        summary.append(
+            {
+                "model": model,
+                "reasoning": reasoning,
+                "requests": len(group),
+                "errors": len(group) - len(ok),
+                "ttft_ms": {"p50": _percentile(ttft, 0.5), "p95": _percentile(ttft, 0.95)},
+                "total_ms": {"p50": _percentile(total, 0.5), "p95": _percentile(total, 0.95)},
+                "output_tokens_mean": round(output_tokens / len(ok), 1) if ok else None,
+                "reasoning_tokens_mean": round(reasoning_tokens / len(ok), 1) if ok else None,
+                "reasoning_share": round(reasoning_tokens / output_tokens, 3) if output_tokens else None,
+                "cost_per_request": statistics.mean(costs) if costs else None,
+            }
+        )
+    return summary
+
+
+def format_table(summary: list[dict[str, Any]]) -> str:
+    """Render the summary as a fixed-width table."""
+
+    def cell(value: Any, spec: str = "") -> str:
+        return "-" if value is None else format(value, spec)
+
+    headers = [
+        "model", "reasoning", "ok/n", "ttft p50", "ttft p95", "total p50", "total p95",
+        "out tok", "reason tok", "reason %", "cost/req",
+    ]
+    rows = [
+        [
+            row["model"],
+            "on" if row["reasoning"] else "off",
+            f"{row['requests'] - row['errors']}/{row['requests']}",
+            cell(row["ttft_ms"]["p50"]),
+            cell(row["ttft_ms"]["p95"]),
+            cell(row["total_ms"]["p50"]),
+            cell(row["total_ms"]["p95"]),
+            cell(row["output_tokens_mean"]),
+            cell(row["reasoning_tokens_mean"]),
+            cell(round(row["reasoning_share"] * 100, 1) if row["reasoning_share"] is not None else None),
+            cell(row["cost_per_request"], ".6f"),
+        ]
+        for row in summary
+    ]
+    widths = [max(len(str(line[i])) for line in [headers, *rows]) for i in range(len(headers))]
+    lines = [headers, ["-" * width for width in widths], *rows]
+    return "\n".join("  ".join(str(value).ljust(width) for value, width in zip(line, widths)) for line in lines)
+
+
+def to_recording(run: dict[str, Any]) -> dict[str, Any]:
+    """Turn a successful run into a recording for RecordedTransport."""
+    usage = {
+        "prompt_tokens": run["prompt_tokens"],
+        "completion_tokens": run["output_tokens"],
+        "total_tokens": run["prompt_tokens"] + run["output_tokens"],
+        "completion_tokens_details": {"reasoning_tokens": run["reasoning_tokens"]},
+    }
+    if run["cost"] is not None:
+        usage["cost"] = run["cost"]
+    return {
+        "model": run["model"],
+        "reasoning": run["reasoning"],
+        "message": run["message"],
+        "content": run["content"],
+        "finish_reason": run["finish_reason"],
+        "usage": usage,
+        "ttft_ms": run["ttft_ms"] or run["total_ms"],
+        "duration_ms": run["total_ms"],
+    }
+
+
+def main() -> None:
+    """Parse arguments, run the benchmark and write the report."""
+    parser = argparse.ArgumentParser(description="Benchmark LLM models on a message corpus")
+    parser.add_argument("--corpus", type=Path, default=Path(BENCHMARK_CORPUS_PATH), help="Corpus JSONL")
+    parser.add_argument(
+        "--model", dest="models", action="append", help="Model to benchmark (repeatable)"
+    )
+    parser.add_argument(
+        "--reasoning", nargs="+", choices=["off", "on"], default=["off", "on"], help="Reasoning modes"
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per message and setting")
+    parser.add_argument("--temperature", type=float, default=DEFAULT_LLM_TEMPERATURE)
+    parser.add_argument(
+        "--max-tokens", type=int, default=None, help="Override the per-request-type output budget"
+    )
+    parser.add_argument(
+        "--recorded", type=Path, help="Serve recorded responses from this JSONL instead of OpenRouter"
+    )
+    parser.add_argument(
+        "--no-latency", action="store_true", help="Serve recorded responses without their latency"
+    )
+    parser.add_argument("--record", type=Path, help="Append successful runs to this recording JSONL")
+    parser.add_argument(
+        "--output", type=Path, default=Path("data/benchmark.json"), help="JSON report path"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    transport = None
+    if args.recorded:
+        transport = RecordedTransport(load_jsonl(args.recorded), simulate_latency=not args.no_latency)
+    models = args.models or [DEFAULT_LLM_MODEL]
+    reasoning_modes = [mode == "on" for mode in args.reasoning]
+
+    runs = asyncio.run(
+        run_benchmark(
+            OpenRouterService(transport=transport),
+            load_jsonl(args.corpus),
+            models,
+            reasoning_modes,
+            repeat=args.repeat,
+            temperature=args.temperature,
+            max_tokens=args.max_tokens,
+        )
+    )
+    summary = summarize(runs)
+    print(format_table(summary))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "generated_at": datetime.now(UTC).isoformat(),
+        "corpus": str(args.corpus),
+        "source": str(args.recorded) if args.recorded else "openrouter",
+        "settings": {
+            "models": models,
+            "reasoning": args.reasoning,
+            "repeat": args.repeat,
+            "temperature": args.temperature,
+            "max_tokens": args.max_tokens,
+        },
+        "summary": summary,
+        "runs": runs,
+    }
+    args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nReport written to {args.output}")
+
+    if args.record:
+        args.record.parent.mkdir(parents=True, exist_ok=True)
+        with args.record.open("a", encoding="utf-8") as f:
+            for run in runs:
+                if "error" not in run:
+                    f.write(json.dumps(to_recording(run), ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
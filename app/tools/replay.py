@@ -0,0 +1,259 @@
+"""
+Replay captured webhook traffic through the app with recorded LLM responses.
+
+Usage:
+    python -m app.tools.replay data/capture/traffic.jsonl --speed 10
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import httpx
+
+from app.api import webhook
+from app.core.config import settings
+from app.core.constants import OPENROUTER_API_BASE_URL
+from app.main import app
+from app.models.llm import LLMCompletion
+from app.services.capture import scrub_text
+from app.services.llm import OpenRouterService, llm_service
+from app.services.plan_store import plan_store
+from app.services.recipes import recipe_library
+
+logger = logging.getLogger(__name__)
+
+
+def load_capture(paths: list[Path]) -> list[dict[str, Any]]:
+    """Load capture records from one or more JSONL files, ordered by time."""
+    records = []
+    for path in paths:
+        with path.open(encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return sorted(records, key=lambda record: record["ts"])
+
+
+def _last_user_message(messages: list[dict[str, str]]) -> str:
+    """Return the last user message content, used to match recorded responses."""
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return scrub_text(message.get("content", ""))
+    return ""
+
+
+def recorded_error(error: dict[str, Any]) -> Exception:
+    """Rebuild the exception of a failed LLM call from its capture record."""
+    request = httpx.Request("POST", f"{OPENROUTER_API_BASE_URL}/chat/completions")
+    if error.get("status") is not None:
+        response = httpx.Response(error["status"], request=request)
+        return httpx.HTTPStatusError(error["message"], request=request, response=response)
+    error_type = getattr(httpx, error["type"], None)
+    if isinstance(error_type, type) and issubclass(error_type, httpx.RequestError):
+        return error_type(error["message"], request=request)
+    return RuntimeError(f"{error['type']}: {error['message']}")
+
+
+class RecordedLLM:
+    """Stand-in for OpenRouterService.complete/stream_completion serving recorded responses."""
+
+    def __init__(
+        self,
+        records: list[dict[str, Any]],
+        simulate_latency: bool = False,
+        speed: float = 1.0,
+        capture_order_fallback: bool = False,
+    ) -> None:
+        """
+        Index recorded LLM calls by their last user message.
+
+        A prompt without a recording raises unless `capture_order_fallback`
+        is set, in which case the next unused recording is served instead.
+        """
+        self.simulate_latency = simulate_latency
+        self.speed = speed
+        self.capture_order_fallback = capture_order_fallback
+        self.by_prompt: dict[str, deque[dict[str, Any]]] = defaultdict(deque)
+        self.unmatched: deque[dict[str, Any]] = deque()
+        self.used: set[int] = set()
+        self.misses = 0
+        for record in records:
+            key = _last_user_message(record["request"].get("messages", []))
+            self.by_prompt[key].append(record)
+            self.unmatched.append(record)
+
+    def _pop_unused(self, queue: deque[dict[str, Any]] | None) -> dict[str, Any] | None:
+        """Pop the first record from a queue that has not been served yet."""
+        while queue:
+            record = queue.popleft()
+            if id(record) not in self.used:
+                self.used.add(id(record))
+                return record
+        return None
+
+    def _next(self, key: str) -> dict[str, Any] | None:
+        """Pop the recorded call for a prompt, optionally falling back to capture order."""
+        record = self._pop_unused(self.by_prompt.get(key))
+        if record is None:
+            self.misses += 1
+            if self.capture_order_fallback:
+                record = self._pop_unused(self.unmatched)
+        return record
+
+    async def complete(self, messages: list[dict[str, str]], **kwargs: Any) -> LLMCompletion:
+        """Return the recorded completion for these messages, or raise its recorded error."""
+        record = self._next(_last_user_message(messages))
+        if record is None:
+            raise RuntimeError("No recorded LLM response for this prompt")
+        if self.simulate_latency and self.speed > 0:
+            await asyncio.sleep(record["duration_ms"] / 1000 / self.speed)
+        if "error" in record:
+            raise recorded_error(record["error"])
+        return OpenRouterService.parse_completion(record["response"])
+
+    async def stream_completion(
+        self, messages: list[dict[str, str]], **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Yield the recorded completion for these messages as one chunk."""
+        completion = await self.complete(messages, **kwargs)
+        yield completion.content
+
+
+async def replay(
+    records: list[dict[str, Any]],
+    speed: float = 1.0,
+    simulate_llm_latency: bool = True,
+    capture_order_fallback: bool = False,
+) -> dict[str, Any]:
+    """
+    Feed captured webhooks through the app in-process.
+
+    Webhooks are posted at their original inter-arrival gaps divided by
+    `speed` (0 sends them all at once). LLM calls are answered from the
+    capture, including recorded failures, outgoing WhatsApp messages are
+    dropped and plans and recipes are stored in memory only.
+
+    Returns:
+        Summary with counts and webhook latency percentiles in ms
+    """
+    webhooks = [record for record in records if record["kind"] == "webhook"]
+    stub = RecordedLLM(
+        [record for record in records if record["kind"] == "llm"],
+        simulate_latency=simulate_llm_latency,
+        speed=speed,
+        capture_order_fallback=capture_order_fallback,
+    )
+    sent: list[tuple[str, str]] = []
+
+    async def drop_message(to_number: str, text: str) -> None:
+        sent.append((to_number, text))
+
+    originals = (
+        settings.capture_enabled,
+        plan_store.path,
+        recipe_library.path,
+        llm_service.complete,
+        llm_service.stream_completion,
+        webhook.send_text_message,
+    )
+    settings.capture_enabled = False
+    plan_store.close()
+    plan_store.path = ":memory:"
+    recipe_library.close()
+    recipe_library.path = ":memory:"
+    llm_service.complete = stub.complete
+    llm_service.stream_completion = stub.stream_completion
+    webhook.send_text_message = drop_message
+
+    latencies: list[float] = []
+    statuses: dict[int, int] = defaultdict(int)
+    transport = httpx.ASGITransport(app=app)
+
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+
+            async def post(body: dict[str, Any]) -> None:
+                started = time.perf_counter()
+                response = await client.post("/webhook", json=body)
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] += 1
+
+            tasks = []
+            origin = webhooks[0]["ts"] if webhooks else 0.0
+            replay_start = time.perf_counter()
+            for record in webhooks:
+                if speed > 0:
+                    due = (record["ts"] - origin) / speed
+                    delay = due - (time.perf_counter() - replay_start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(post(record["body"])))
+            await asyncio.gather(*tasks)
+    finally:
+        # Put the app back as it was so replay can run inside a live process or test
+        plan_store.close()
+        recipe_library.close()
+        (
+            settings.capture_enabled,
+            plan_store.path,
+            recipe_library.path,
+            llm_service.complete,
+            llm_service.stream_completion,
+            webhook.send_text_message,
+        ) = originals
+
+    latencies.sort()
+    return {
+        "webhooks": len(webhooks),
+        "statuses": dict(statuses),
+        "messages_sent": len(sent),
+        "llm_misses": stub.misses,
+        "latency_ms": {
+            "p50": round(statistics.median(latencies), 1) if latencies else 0.0,
+            "p95": round(latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else 0.0,
+            "max": round(latencies[-1], 1) if latencies else 0.0,
+        },
+    }
+
+
+def main() -> None:
+    """Parse arguments and run a replay."""
+    parser = argparse.ArgumentParser(description="Replay captured Botatouille traffic")
+    parser.add_argument("captures", nargs="+", type=Path, help="Capture JSONL file(s)")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Pace multiplier: 1 = original pace, 10 = 10x faster, 0 = no delays",
+    )
+    parser.add_argument(
+        "--no-llm-latency",
+        action="store_true",
+        help="Answer LLM calls instantly instead of at recorded latency",
+    )
+    parser.add_argument(
+        "--capture-order-fallback",
+        action="store_true",
+        help="Answer prompts without a recording with the next unused recording",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    summary = asyncio.run(
+        replay(
+            load_capture(args.captures),
+            speed=args.speed,
+            simulate_llm_latency=not args.no_llm_latency,
+            capture_order_fallback=args.capture_order_fallback,
+        )
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
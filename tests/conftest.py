@@ -6,6 +6,9 @@ from fastapi.testclient import TestClient
 
 from app.main import app
 from app.services.llm import OpenRouterService
+from app.services.plan_store import PlanStore
+from app.services.precompute import meal_plan_precomputer
+from app.services.recipes import RecipeLibrary
 
 
 @pytest.fixture
@@ -20,6 +23,25 @@ def llm_service():
     return OpenRouterService()
 
 
+@pytest.fixture
+def plan_store(mocker):
+    """In-memory plan store wired into the webhook and precomputer."""
+    store = PlanStore(":memory:")
+    mocker.patch("app.api.webhook.plan_store", store)
+    mocker.patch.object(meal_plan_precomputer, "store", store)
+    yield store
+    store.close()
+
+
+@pytest.fixture(autouse=True)
+def recipe_library(mocker):
+    """In-memory recipe library wired into the webhook."""
+    library = RecipeLibrary(":memory:")
+    mocker.patch("app.api.webhook.recipe_library", library)
+    yield library
+    library.close()
+
+
 @pytest.fixture
 def mock_httpx_client(mocker):
     """Mock httpx AsyncClient with success response."""
@@ -0,0 +1,143 @@
+"""Tests for the offline model benchmark."""
+
+import json
+import pytest
+from pathlib import Path
+
+import httpx
+
+from app.core.constants import BENCHMARK_CORPUS_PATH, BENCHMARK_RECORDING_PATH, DEFAULT_LLM_MODEL
+from app.services.llm import OpenRouterService
+from app.tools.benchmark import (
+    RecordedTransport,
+    format_table,
+    load_jsonl,
+    run_benchmark,
+    summarize,
+    to_recording,
+)
+
+CORPUS = [
+    {"id": "greeting", "message": "Hello"},
+    {"id": "recipe", "message": "Give me a recipe for soup"},
+]
+
+
+def make_recording(message, reasoning, reasoning_tokens=0):
+    """Recorded response for a message."""
+    return {
+        "model": "test/model",
+        "reasoning": reasoning,
+        "message": message,
+        "content": "Some answer that takes a few chunks to stream",
+        "usage": {
+            "prompt_tokens": 100,
+            "completion_tokens": 20 + reasoning_tokens,
+            "total_tokens": 120 + reasoning_tokens,
+            "completion_tokens_details": {"reasoning_tokens": reasoning_tokens},
+            "cost": 0.0001,
+        },
+        "ttft_ms": 300.0,
+        "duration_ms": 900.0,
+    }
+
+
+@pytest.mark.unit
+class TestBenchmark:
+    """Test benchmark runs against the recorded stand-in."""
+
+    async def test_metrics_per_model_and_setting(self):
+        """Test every setting is run through the service and summarized."""
+        recordings = [make_recording(item["message"], False) for item in CORPUS]
+        recordings += [make_recording(item["message"], True, reasoning_tokens=30) for item in CORPUS]
+        service = OpenRouterService(transport=RecordedTransport(recordings, simulate_latency=False))
+
+        runs = await run_benchmark(service, CORPUS, ["test/model"], [False, True])
+        summary = summarize(runs)
+
+        assert len(runs) == 4
+        assert all(run["ttft_ms"] is not None and run["total_ms"] >= run["ttft_ms"] for run in runs)
+        off, on = summary
+        assert off["errors"] == 0
+        assert off["output_tokens_mean"] == 20
+        assert off["reasoning_share"] == 0
+        assert on["reasoning_tokens_mean"] == 30
+        assert on["reasoning_share"] == 0.6
+        assert on["cost_per_request"] == pytest.approx(0.0001)
+        assert "test/model" in format_table(summary)
+
+    async def test_unrecorded_requests_are_errors(self):
+        """Test requests without a recording fail without stopping the run."""
+        service = OpenRouterService(
+            transport=RecordedTransport([make_recording("Hello", False)], simulate_latency=False)
+        )
+
+        runs = await run_benchmark(service, CORPUS, ["test/model", "other/model"], [False])
+        summary = summarize(runs)
+
+        assert [row["errors"] for row in summary] == [1, 2]
+        assert summary[1]["ttft_ms"]["p50"] is None
+        assert "-" in format_table(summary)
+
+    async def test_runs_round_trip_as_recordings(self):
+        """Test a recorded run replays with the same usage."""
+        service = OpenRouterService(
+            transport=RecordedTransport([make_recording("Hello", True, 5)], simulate_latency=False)
+        )
+        first = await run_benchmark(service, CORPUS[:1], ["test/model"], [True])
+
+        replayed = OpenRouterService(
+            transport=RecordedTransport([to_recording(first[0])], simulate_latency=False)
+        )
+        second = await run_benchmark(replayed, CORPUS[:1], ["test/model"], [True])
+
+        for key in ("content", "output_tokens", "reasoning_tokens", "cost"):
+            assert second[0][key] == first[0][key]
+
+    async def test_request_matches_production(self):
+        """Test the benchmark sends the messages and max_tokens of a real reply."""
+        payloads = []
+
+        def handler(request):
+            payloads.append(json.loads(request.content))
+            return httpx.Response(
+                200,
+                text='data: {"choices": [{"delta": {"content": "Hi"}, "finish_reason": "stop"}]}\n\n'
+                "data: [DONE]\n\n",
+                headers={"Content-Type": "text/event-stream"},
+            )
+
+        service = OpenRouterService(transport=httpx.MockTransport(handler))
+        messages, budget = service.meal_plan_request(CORPUS[1]["message"])
+
+        runs = await run_benchmark(service, CORPUS[1:], ["test/model"], [False])
+
+        assert runs[0]["request_type"] == "recipe"
+        assert payloads[0]["messages"] == messages
+        assert payloads[0]["max_tokens"] == budget.max_tokens
+
+    async def test_malformed_stream_is_a_run_error(self):
+        """Test a malformed server-sent event fails that run, not the whole matrix."""
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(
+                200, text="data: {not json\n\n", headers={"Content-Type": "text/event-stream"}
+            )
+        )
+        service = OpenRouterService(transport=transport)
+
+        runs = await run_benchmark(service, CORPUS, ["test/model"], [False, True])
+
+        assert len(runs) == 4
+        assert all(run["error"].startswith("JSONDecodeError") for run in runs)
+
+    def test_bundled_recording_covers_corpus(self):
+        """Test the offline recording answers every corpus message in both modes."""
+        corpus = load_jsonl(Path(BENCHMARK_CORPUS_PATH))
+        recorded = {
+            (record["model"], record["reasoning"], record["message"])
+            for record in load_jsonl(Path(BENCHMARK_RECORDING_PATH))
+        }
+
+        for item in corpus:
+            for reasoning in (False, True):
+                assert (DEFAULT_LLM_MODEL, reasoning, item["message"]) in recorded
@@ -0,0 +1,146 @@
+"""Tests for traffic capture and replay."""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+
+from app.api import webhook
+from app.core.config import settings
+from app.services.capture import REDACTED, TrafficRecorder, redact
+from app.services.llm import OpenRouterService, llm_service
+from app.services.plan_store import plan_store
+from app.services.recipes import recipe_library
+from app.tools.replay import RecordedLLM, load_capture, replay
+
+
+def llm_record(user_content, content, ts=1.0):
+    """Build a captured LLM request/response pair."""
+    return {
+        "kind": "llm",
+        "ts": ts,
+        "duration_ms": 5.0,
+        "request": {"messages": [{"role": "user", "content": user_content}]},
+        "response": {"choices": [{"message": {"content": content}, "finish_reason": "stop"}]},
+    }
+
+
+@pytest.mark.unit
+class TestCapture:
+    """Test redaction and the rotating recorder."""
+
+    def test_redact_webhook(self, sample_whatsapp_text_message):
+        """Test phone numbers are pseudonymized and names and emails removed."""
+        value = sample_whatsapp_text_message["entry"][0]["changes"][0]["value"]
+        value["contacts"] = [{"profile": {"name": "Alice"}, "wa_id": "33612345678"}]
+        value["messages"][0]["text"]["body"] = "Mail me at alice@example.com or +33 6 12 34 56 78"
+        value["messages"][0]["timestamp"] = "1234567890"
+
+        redacted = redact(sample_whatsapp_text_message)
+        value = redacted["entry"][0]["changes"][0]["value"]
+
+        message = value["messages"][0]
+        assert message["from"].startswith("user-")
+        assert message["from"] == value["contacts"][0]["wa_id"]
+        assert message["timestamp"] == "1234567890"
+        assert value["contacts"][0]["profile"]["name"] == REDACTED
+        assert message["text"]["body"] == f"Mail me at {REDACTED} or {REDACTED}"
+
+    def test_recorder_rotates(self, tmp_path, mocker):
+        """Test the capture file rotates once it exceeds max_bytes."""
+        mocker.patch.object(settings, "capture_enabled", True)
+        recorder = TrafficRecorder(str(tmp_path / "traffic.jsonl"), max_bytes=200, backup_count=2)
+
+        for _ in range(10):
+            recorder.record_webhook({"object": "whatsapp_business_account", "entry": []})
+
+        files = sorted(path.name for path in tmp_path.iterdir())
+        assert files == ["traffic.jsonl", "traffic.jsonl.1", "traffic.jsonl.2"]
+        assert len(load_capture([tmp_path / "traffic.jsonl"])) >= 1
+
+    def test_recorder_disabled_by_default(self, tmp_path):
+        """Test nothing is written unless capture is enabled."""
+        recorder = TrafficRecorder(str(tmp_path / "traffic.jsonl"))
+        recorder.record_webhook({"object": "whatsapp_business_account"})
+
+        assert not (tmp_path / "traffic.jsonl").exists()
+
+
+@pytest.mark.unit
+class TestReplay:
+    """Test replaying captured traffic."""
+
+    async def test_recorded_llm_matches_prompt(self):
+        """Test responses are matched by prompt and misses fail by default."""
+        stub = RecordedLLM([llm_record("first", "A"), llm_record("second", "B")])
+
+        second = await stub.complete([{"role": "user", "content": "second"}])
+        with pytest.raises(RuntimeError):
+            await stub.complete([{"role": "user", "content": "other"}])
+
+        assert second.content == "B"
+        assert stub.misses == 1
+
+    async def test_capture_order_fallback(self):
+        """Test misses can opt in to the next unused recording."""
+        stub = RecordedLLM(
+            [llm_record("first", "A"), llm_record("second", "B")], capture_order_fallback=True
+        )
+
+        second = await stub.complete([{"role": "user", "content": "second"}])
+        unknown = await stub.complete([{"role": "user", "content": "other"}])
+
+        assert second.content == "B"
+        assert unknown.content == "A"
+        assert stub.misses == 1
+
+    async def test_failed_llm_calls_are_captured_and_replayed(self, tmp_path, mocker):
+        """Test an upstream error is recorded and raised again on replay."""
+        mocker.patch.object(settings, "capture_enabled", True)
+        recorder = TrafficRecorder(str(tmp_path / "traffic.jsonl"))
+        mocker.patch("app.services.llm.traffic_recorder", recorder)
+        request = httpx.Request("POST", "https://openrouter.ai/api/v1/chat/completions")
+        response = httpx.Response(429, request=request)
+        client = MagicMock()
+        client.post = AsyncMock(return_value=response)
+        client.__aenter__ = AsyncMock(return_value=client)
+        client.__aexit__ = AsyncMock(return_value=None)
+        mocker.patch("httpx.AsyncClient", return_value=client)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await OpenRouterService().complete([{"role": "user", "content": "Hello"}])
+
+        records = load_capture([tmp_path / "traffic.jsonl"])
+        assert records[0]["error"]["status"] == 429
+        stub = RecordedLLM(records)
+        with pytest.raises(httpx.HTTPStatusError) as error:
+            await stub.complete([{"role": "user", "content": "Hello"}])
+        assert error.value.response.status_code == 429
+
+    async def test_replay_capture(self, sample_whatsapp_text_message, tmp_path, mocker):
+        """Test a capture is replayed with stubbed LLM and WhatsApp, then the app is restored."""
+        complete = mocker.patch.object(llm_service, "complete")
+        stream_completion = mocker.patch.object(llm_service, "stream_completion")
+        send_text_message = mocker.patch("app.api.webhook.send_text_message")
+        mocker.patch.object(plan_store, "path")
+        mocker.patch.object(recipe_library, "path")
+        mocker.patch.object(settings, "capture_enabled", True)
+
+        capture = tmp_path / "traffic.jsonl"
+        records = [
+            {"kind": "webhook", "ts": 0.0, "body": sample_whatsapp_text_message},
+            llm_record("Test message", "Recorded reply", ts=0.1),
+        ]
+        capture.write_text("\n".join(json.dumps(record) for record in records))
+
+        summary = await replay(load_capture([capture]), speed=0)
+
+        assert summary["webhooks"] == 1
+        assert summary["statuses"] == {200: 1}
+        assert summary["messages_sent"] == 1
+        assert summary["llm_misses"] == 0
+        assert llm_service.complete is complete
+        assert llm_service.stream_completion is stream_completion
+        assert webhook.send_text_message is send_text_message
+        assert settings.capture_enabled
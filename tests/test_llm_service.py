@@ -9,7 +9,12 @@ from app.core.constants import (
     DEFAULT_LLM_TEMPERATURE,
     DEFAULT_LLM_MAX_TOKENS,
     MEAL_PLANNING_SYSTEM_PROMPT,
+    LLM_BUDGET_MIN_SAMPLES,
+    LLM_CHARS_PER_TOKEN,
+    LLM_MAX_TOKENS_BY_REQUEST_TYPE,
 )
+from app.models.llm import LLMCompletion, LLMUsage
+from app.services.output_budget import OutputBudgeter, detect_request_type
 
 
 @pytest.mark.unit
@@ -92,18 +97,125 @@ class TestOpenRouterService:
     async def test_meal_plan_generation(self, llm_service, mocker):
         """Test meal plan response generation."""
         expected = "Here's your meal plan!"
-        mock_chat = AsyncMock(return_value=expected)
-        mocker.patch.object(llm_service, "chat_completion", mock_chat)
+        mock_complete = AsyncMock(return_value=LLMCompletion(content=expected))
+        mocker.patch.object(llm_service, "complete", mock_complete)
 
         response = await llm_service.generate_meal_plan_response("Plan for 3 days")
 
         assert response == expected
-        call_args = mock_chat.call_args[0][0]
+        call_args = mock_complete.call_args[0][0]
         assert len(call_args) == 2
         assert call_args[0]["role"] == "system"
-        assert call_args[0]["content"] == MEAL_PLANNING_SYSTEM_PROMPT
+        assert call_args[0]["content"].startswith(MEAL_PLANNING_SYSTEM_PROMPT)
         assert call_args[1]["role"] == "user"
 
+    async def test_grounding_context(self, llm_service, mocker):
+        """Test saved recipes are passed as an extra system message."""
+        mock_complete = AsyncMock(return_value=LLMCompletion(content="Pesto pasta!"))
+        mocker.patch.object(llm_service, "complete", mock_complete)
+
+        await llm_service.generate_meal_plan_response(
+            "Dinner idea?", context="- Pesto Pasta: penne, pesto"
+        )
+
+        call_args = mock_complete.call_args[0][0]
+        assert len(call_args) == 3
+        assert call_args[1]["role"] == "system"
+        assert "- Pesto Pasta: penne, pesto" in call_args[1]["content"]
+
+    async def test_completion_metadata(self, llm_service, mocker):
+        """Test finish reason and usage are parsed from the response."""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {
+            "choices": [{"message": {"content": "Hi"}, "finish_reason": "length"}],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 34, "total_tokens": 46},
+        }
+        mock_response.raise_for_status = MagicMock()
+
+        mock_client = MagicMock()
+        mock_client.post = AsyncMock(return_value=mock_response)
+        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+        mock_client.__aexit__ = AsyncMock(return_value=None)
+        mocker.patch("httpx.AsyncClient", return_value=mock_client)
+
+        completion = await llm_service.complete([{"role": "user", "content": "Test"}])
+
+        assert completion.content == "Hi"
+        assert completion.truncated
+        assert completion.usage.completion_tokens == 34
+
+    async def test_max_tokens_follows_request_type(self, llm_service, mocker):
+        """Test short questions get a smaller budget than meal plans."""
+        mock_complete = AsyncMock(return_value=LLMCompletion(content="Yes"))
+        mocker.patch.object(llm_service, "complete", mock_complete)
+
+        await llm_service.generate_meal_plan_response("Is tofu gluten free?")
+        chat_tokens = mock_complete.call_args.kwargs["max_tokens"]
+        await llm_service.generate_meal_plan_response("Plan my meals for the week")
+        plan_tokens = mock_complete.call_args.kwargs["max_tokens"]
+
+        assert chat_tokens == LLM_MAX_TOKENS_BY_REQUEST_TYPE["chat"]
+        assert plan_tokens > chat_tokens
+
+    async def test_truncated_response_is_continued(self, llm_service, mocker):
+        """Test a length-truncated response is continued, not regenerated."""
+        mock_complete = AsyncMock(
+            side_effect=[
+                LLMCompletion(
+                    content="Monday: pasta",
+                    finish_reason="length",
+                    usage=LLMUsage(completion_tokens=100),
+                ),
+                LLMCompletion(
+                    content=", Tuesday: soup",
+                    finish_reason="stop",
+                    usage=LLMUsage(completion_tokens=20),
+                ),
+            ]
+        )
+        mocker.patch.object(llm_service, "complete", mock_complete)
+        mock_record = mocker.patch.object(llm_service.budgeter, "record")
+
+        response = await llm_service.generate_meal_plan_response("Plan my week")
+
+        assert response == "Monday: pasta, Tuesday: soup"
+        continuation = mock_complete.call_args_list[1][0][0]
+        assert continuation[-2] == {"role": "assistant", "content": "Monday: pasta"}
+        mock_record.assert_called_once_with("meal_plan", 120)
+
+
+@pytest.mark.unit
+class TestOutputBudgeter:
+    """Test suite for OutputBudgeter."""
+
+    def test_detect_request_type(self):
+        """Test keyword-based request type detection."""
+        assert detect_request_type("Plan my meals for the week") == "meal_plan"
+        assert detect_request_type("Fais-moi la liste de courses") == "shopping_list"
+        assert detect_request_type("Recipe for ratatouille?") == "recipe"
+        assert detect_request_type("Can you explain umami?") == "chat"
+        assert detect_request_type("Suggest three main courses for a dinner party") == "chat"
+        assert detect_request_type("What can I cook with leftover rice in 10 days?") == "chat"
+
+    def test_remaining_length_caps_max_tokens(self):
+        """Test the WhatsApp length budget caps max_tokens."""
+        budget = OutputBudgeter().plan("meal_plan", remaining_chars=800)
+
+        assert budget.max_tokens == 800 // LLM_CHARS_PER_TOKEN
+        assert "800 characters" in budget.style_directive
+
+    def test_learned_limit_tightens_budget(self):
+        """Test observed usage tightens the default limit."""
+        budgeter = OutputBudgeter()
+        assert budgeter.learned_limit("recipe") is None
+
+        for _ in range(LLM_BUDGET_MIN_SAMPLES):
+            budgeter.record("recipe", 200)
+
+        budget = budgeter.plan("recipe")
+        assert budget.max_tokens < LLM_MAX_TOKENS_BY_REQUEST_TYPE["recipe"]
+        assert budget.max_tokens >= 200
+
     async def test_reasoning_parameter(self, llm_service, mocker):
         """Test reasoning parameter is passed correctly."""
         mock_response = MagicMock()
@@ -0,0 +1,161 @@
+"""Tests for load monitoring, readiness and admission control."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from app.core.constants import (
+    BUSY_MESSAGE,
+    LOAD_ERROR_MIN_SAMPLES,
+    LOAD_MAX_IN_FLIGHT_LLM,
+    LOAD_MAX_IN_FLIGHT_MESSAGES,
+    LOAD_MAX_QUEUED_LLM,
+)
+from app.services.load import (
+    ADMIT,
+    SHED_ACK,
+    SHED_BUSY_REPLY,
+    SHED_DEFER,
+    AdmissionController,
+    LoadMonitor,
+    load_monitor,
+)
+from app.services.scheduler import FairScheduler
+
+
+@pytest.mark.unit
+class TestLoadMonitor:
+    """Test suite for LoadMonitor and AdmissionController."""
+
+    def test_idle_process_is_ready(self):
+        """Test a fresh monitor reports ready."""
+        readiness = LoadMonitor().readiness()
+
+        assert readiness["ready"]
+        assert readiness["overloaded"] == []
+
+    def test_in_flight_llm_tracking(self):
+        """Test in-flight LLM requests are counted and released."""
+        monitor = LoadMonitor()
+        with monitor.track_llm():
+            assert monitor.in_flight_llm == 1
+        assert monitor.in_flight_llm == 0
+
+    async def test_queued_llm_requests_make_process_not_ready(self):
+        """Test a scheduler backlog shows up although in-flight LLM requests are capped."""
+        scheduler = FairScheduler(concurrency=1)
+        monitor = LoadMonitor(scheduler)
+
+        async def request():
+            async with scheduler.slot("a"):
+                pass
+
+        async with scheduler.slot("blocker"):
+            tasks = [asyncio.create_task(request()) for _ in range(LOAD_MAX_QUEUED_LLM)]
+            await asyncio.sleep(0)
+            readiness = monitor.readiness()
+        await asyncio.gather(*tasks)
+
+        assert readiness["queued_llm"] == LOAD_MAX_QUEUED_LLM
+        assert readiness["overloaded"] == ["llm_queue"]
+        assert monitor.readiness()["ready"]
+
+    def test_busy_llm_slots_without_backlog_are_ready(self):
+        """Test a fully used process with nothing queued keeps admitting messages."""
+        monitor = LoadMonitor(FairScheduler())
+        monitor.in_flight_llm = LOAD_MAX_IN_FLIGHT_LLM
+
+        readiness = monitor.readiness()
+
+        assert readiness["ready"]
+        assert readiness["queued_llm"] == 0
+        assert AdmissionController(monitor, mode=SHED_BUSY_REPLY).decide() == ADMIT
+
+    def test_upstream_error_rate(self):
+        """Test failed upstream calls make the process not ready."""
+        monitor = LoadMonitor()
+        for _ in range(LOAD_ERROR_MIN_SAMPLES):
+            with pytest.raises(RuntimeError):
+                with monitor.track_llm():
+                    raise RuntimeError("upstream down")
+
+        assert monitor.upstream_error_rate == 1.0
+        assert "upstream_errors" in monitor.readiness()["overloaded"]
+
+    def test_admission_decisions(self):
+        """Test the configured mode applies when overloaded, ack when critical."""
+        monitor = LoadMonitor()
+        controller = AdmissionController(monitor, mode=SHED_BUSY_REPLY)
+        assert controller.decide() == ADMIT
+
+        monitor.in_flight_messages = LOAD_MAX_IN_FLIGHT_MESSAGES
+        assert controller.decide() == SHED_BUSY_REPLY
+
+        monitor.loop_lag_ms = 10_000
+        assert controller.decide() == SHED_ACK
+
+    async def test_deferred_work_runs_when_ready(self, mocker):
+        """Test deferred work waits for readiness before running."""
+        mocker.patch("app.services.load.LOAD_DEFER_POLL_SECONDS", 0.01)
+        monitor = LoadMonitor()
+        monitor.in_flight_messages = LOAD_MAX_IN_FLIGHT_MESSAGES
+        controller = AdmissionController(monitor, mode=SHED_DEFER)
+        work = AsyncMock()
+
+        controller.defer(work)
+        await asyncio.sleep(0.03)
+        work.assert_not_called()
+
+        monitor.in_flight_messages = 0
+        await asyncio.sleep(0.03)
+        work.assert_awaited_once()
+
+
+@pytest.mark.integration
+class TestLoadEndpoints:
+    """Test health endpoints and shedding in the webhook."""
+
+    def test_liveness(self, client):
+        """Test liveness endpoints always answer healthy."""
+        assert client.get("/health").json() == {"status": "healthy"}
+        assert client.get("/health/live").json() == {"status": "healthy"}
+
+    def test_readiness(self, client, mocker):
+        """Test readiness returns 503 while overloaded."""
+        assert client.get("/health/ready").status_code == 200
+
+        mocker.patch.object(load_monitor, "in_flight_llm", LOAD_MAX_IN_FLIGHT_LLM)
+        assert client.get("/health/ready").status_code == 200
+
+        mocker.patch.object(load_monitor, "in_flight_messages", LOAD_MAX_IN_FLIGHT_MESSAGES)
+        response = client.get("/health/ready")
+
+        assert response.status_code == 503
+        assert response.json()["overloaded"] == ["queue"]
+
+    def test_overloaded_webhook_sends_busy_reply(self, client, sample_whatsapp_text_message, mocker):
+        """Test new messages get a cheap busy reply instead of an LLM call."""
+        mocker.patch("app.api.webhook.admission_controller.decide", return_value=SHED_BUSY_REPLY)
+        mock_llm = AsyncMock()
+        mocker.patch("app.api.webhook.llm_service.generate_meal_plan_response", mock_llm)
+        mock_send = AsyncMock()
+        mocker.patch("app.api.webhook.send_text_message", mock_send)
+
+        response = client.post("/webhook", json=sample_whatsapp_text_message)
+
+        assert response.status_code == 200
+        mock_llm.assert_not_called()
+        mock_send.assert_called_once_with("33612345678", BUSY_MESSAGE)
+
+    def test_critically_overloaded_webhook_only_acknowledges(
+        self, client, sample_whatsapp_text_message, mocker
+    ):
+        """Test messages are acknowledged without processing when critical."""
+        mocker.patch("app.api.webhook.admission_controller.decide", return_value=SHED_ACK)
+        mock_send = AsyncMock()
+        mocker.patch("app.api.webhook.send_text_message", mock_send)
+
+        response = client.post("/webhook", json=sample_whatsapp_text_message)
+
+        assert response.status_code == 200
+        mock_send.assert_not_called()
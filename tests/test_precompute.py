@@ -0,0 +1,219 @@
+"""Unit tests for weekly meal plan precomputation."""
+
+import pytest
+from datetime import UTC, date, datetime, timedelta
+from unittest.mock import MagicMock
+
+from app.core.constants import DAYS_OF_WEEK, INCOMPLETE_PLAN_MESSAGE
+from app.models.llm import LLMUsage
+from app.models.meal_plan import DayPlan, MealPlan
+from app.services.plan_store import JOB_FAILED, plan_week_start
+from app.services.precompute import (
+    MealPlanPrecomputer,
+    is_weekly_plan_request,
+    parse_preferences_command,
+)
+from app.services.structured_plan import meal_plan_max_tokens
+
+SATURDAY_NIGHT = datetime(2026, 10, 17, 3, 0, tzinfo=UTC)
+
+
+def make_day(day):
+    """A valid day of meals."""
+    return DayPlan(day=day, meals={"lunch": f"{day} salad", "dinner": f"{day} pasta"})
+
+
+def make_stream(days, tokens=500):
+    """Fake stream_meal_plan yielding the given days and reporting usage."""
+
+    async def stream_meal_plan(*args, on_usage=None, **kwargs):
+        if on_usage is not None:
+            on_usage(LLMUsage(prompt_tokens=300, completion_tokens=tokens, total_tokens=tokens + 300))
+        for day in days:
+            yield day
+
+    return stream_meal_plan
+
+
+def make_llm(days=None, tokens=500):
+    """Mock LLM service streaming a fixed plan (a full week by default)."""
+    llm = MagicMock()
+    if days is None:
+        days = [make_day(day) for day in DAYS_OF_WEEK]
+    llm.stream_meal_plan = MagicMock(side_effect=make_stream(days, tokens))
+    return llm
+
+
+WEEK = MealPlan(days=[make_day(day) for day in DAYS_OF_WEEK])
+
+
+async def collect(precomputer, phone="331"):
+    """Collect the messages of a weekly plan request."""
+    return [part async for part in precomputer.stream_weekly_plan(phone, "Plan my week")]
+
+
+@pytest.mark.unit
+class TestPlanHelpers:
+    """Test request parsing and week helpers."""
+
+    def test_plan_week_start(self):
+        """Test plans target the next Monday, or today on Mondays."""
+        assert plan_week_start(SATURDAY_NIGHT) == date(2026, 10, 19)
+        assert plan_week_start(datetime(2026, 10, 19, 12, tzinfo=UTC)) == date(2026, 10, 19)
+
+    def test_parse_preferences_command(self):
+        """Test preference commands are detected case-insensitively."""
+        assert parse_preferences_command("Preferences: vegetarian") == "vegetarian"
+        assert parse_preferences_command("préférences: sans gluten") == "sans gluten"
+        assert parse_preferences_command("Plan my week") is None
+
+    def test_is_weekly_plan_request(self):
+        """Test only whole-week plan requests are served from the store."""
+        assert is_weekly_plan_request("Plan my meals for the week")
+        assert not is_weekly_plan_request("Plan dinner for 3 days")
+
+    def test_offpeak_window(self):
+        """Test the off-peak window check."""
+        assert MealPlanPrecomputer.in_offpeak_window(SATURDAY_NIGHT)
+        assert not MealPlanPrecomputer.in_offpeak_window(SATURDAY_NIGHT.replace(hour=19))
+
+
+@pytest.mark.unit
+class TestMealPlanPrecomputer:
+    """Test suite for MealPlanPrecomputer."""
+
+    async def test_run_once_precomputes_active_users(self, plan_store):
+        """Test active users get a stored plan for next week."""
+        plan_store.set_preferences("331", "vegetarian")
+        llm = make_llm()
+        precomputer = MealPlanPrecomputer(store=plan_store, llm=llm)
+
+        stats = await precomputer.run_once(datetime.now(UTC))
+
+        assert stats["completed"] == 1
+        assert "vegetarian" in llm.stream_meal_plan.call_args[0][0]
+        assert plan_store.get_fresh_plan("331", plan_week_start()) == WEEK.model_dump_json()
+        assert stats["tokens"] == 500
+
+        # A second run has nothing left to do
+        stats = await precomputer.run_once(datetime.now(UTC))
+        assert stats["completed"] == 0
+
+    async def test_inactive_users_are_skipped(self, plan_store):
+        """Test users outside the activity window are not precomputed."""
+        plan_store.set_preferences("331", "vegetarian")
+        precomputer = MealPlanPrecomputer(store=plan_store, llm=make_llm())
+
+        stats = await precomputer.run_once(datetime.now(UTC) + timedelta(days=30))
+
+        assert stats["completed"] == 0
+
+    async def test_token_budget_leaves_jobs_pending(self, plan_store):
+        """Test no job starts once the run's token budget would be exceeded."""
+        for phone in ("331", "332", "333"):
+            plan_store.set_preferences(phone, "")
+        precomputer = MealPlanPrecomputer(
+            store=plan_store, llm=make_llm(tokens=1000), max_concurrency=1, token_budget=2000
+        )
+
+        stats = await precomputer.run_once(datetime.now(UTC))
+
+        assert stats["completed"] == 1
+        assert stats["skipped"] == 2
+        assert stats["tokens"] == 1000
+        assert len(plan_store.pending_jobs(plan_week_start())) == 2
+
+    async def test_job_reservation_covers_plan_and_repair(self, plan_store):
+        """Test a job needs room for its plan request and one repair call."""
+        plan_store.set_preferences("331", "")
+        precomputer = MealPlanPrecomputer(
+            store=plan_store,
+            llm=make_llm(tokens=10),
+            token_budget=2 * meal_plan_max_tokens(len(DAYS_OF_WEEK)) - 1,
+        )
+
+        stats = await precomputer.run_once(datetime.now(UTC))
+
+        assert stats["completed"] == 0
+        assert stats["skipped"] == 1
+
+    async def test_failed_job_is_recorded(self, plan_store):
+        """Test LLM failures mark the job as failed."""
+        plan_store.set_preferences("331", "")
+        llm = MagicMock()
+        llm.stream_meal_plan.side_effect = Exception("LLM error")
+        precomputer = MealPlanPrecomputer(store=plan_store, llm=llm)
+
+        stats = await precomputer.run_once(datetime.now(UTC))
+
+        assert stats["failed"] == 1
+        row = plan_store.conn.execute("SELECT status FROM plan_jobs").fetchone()
+        assert row["status"] == JOB_FAILED
+
+    async def test_precomputed_plan_served_until_preferences_change(self, plan_store):
+        """Test the stored plan is served, and streamed afresh after a preference change."""
+        plan_store.set_preferences("331", "vegetarian")
+        plan_store.save_plan(
+            "331",
+            plan_week_start(),
+            plan_store.current_preferences_hash("331"),
+            WEEK.model_dump_json(),
+        )
+        days = [make_day(day) for day in reversed(DAYS_OF_WEEK)]
+        llm = make_llm(days)
+        precomputer = MealPlanPrecomputer(store=plan_store, llm=llm)
+
+        assert await collect(precomputer) == [WEEK.to_text()]
+        llm.stream_meal_plan.assert_not_called()
+
+        plan_store.set_preferences("331", "vegan")
+        assert await collect(precomputer) == [day.to_text() for day in days]
+        assert await collect(precomputer) == [WEEK.to_text()]
+        llm.stream_meal_plan.assert_called_once()
+
+    async def test_incomplete_streamed_plan_not_stored(self, plan_store):
+        """Test a plan missing days is sent with a note but regenerated next time."""
+        days = [make_day("monday"), make_day("tuesday")]
+        llm = make_llm(days)
+        precomputer = MealPlanPrecomputer(store=plan_store, llm=llm)
+
+        missing = "Wednesday, Thursday, Friday, Saturday, Sunday"
+        assert await collect(precomputer) == [day.to_text() for day in days] + [
+            INCOMPLETE_PLAN_MESSAGE.format(days=missing)
+        ]
+        assert plan_store.get_fresh_plan("331", plan_week_start()) is None
+        await collect(precomputer)
+        assert llm.stream_meal_plan.call_count == 2
+
+    async def test_live_plan_grounded_in_context(self, plan_store):
+        """Test saved recipes are passed on to a live plan."""
+        llm = make_llm()
+        precomputer = MealPlanPrecomputer(store=plan_store, llm=llm)
+
+        async for _ in precomputer.stream_weekly_plan("331", "Plan my week", context="Pesto pasta"):
+            pass
+
+        assert llm.stream_meal_plan.call_args.kwargs["context"] == "Pesto pasta"
+
+    async def test_incomplete_precomputed_plan_fails(self, plan_store):
+        """Test the off-peak job does not store a plan missing days."""
+        plan_store.set_preferences("331", "")
+        precomputer = MealPlanPrecomputer(
+            store=plan_store, llm=make_llm([make_day("monday")])
+        )
+
+        stats = await precomputer.run_once(datetime.now(UTC))
+
+        assert stats["failed"] == 1
+        assert plan_store.get_fresh_plan("331", plan_week_start()) is None
+
+    async def test_outdated_stored_plan_is_regenerated(self, plan_store):
+        """Test a stored plan not in the MealPlan format is not served."""
+        plan_store.save_plan(
+            "331", plan_week_start(), plan_store.current_preferences_hash("331"), "Free text plan"
+        )
+        llm = make_llm()
+        precomputer = MealPlanPrecomputer(store=plan_store, llm=llm)
+
+        assert await collect(precomputer) == [day.to_text() for day in WEEK.days]
+        llm.stream_meal_plan.assert_called_once()
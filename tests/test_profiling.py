@@ -0,0 +1,104 @@
+"""Tests for event-loop blocking detection and the profiling endpoint."""
+
+import asyncio
+import threading
+import time
+import pytest
+
+from app.core.config import settings
+from app.services.profiling import LoopBlockingDetector, SamplingProfiler
+
+
+def busy_worker(stop):
+    """Spin until told to stop, so the profiler has something to sample."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.mark.unit
+class TestProfiling:
+    """Test suite for LoopBlockingDetector and SamplingProfiler."""
+
+    async def test_detects_blocking_callback(self):
+        """Test a blocking call on the loop is reported with its stack."""
+        detector = LoopBlockingDetector(threshold_ms=100)
+        detector.start()
+        try:
+            await asyncio.sleep(0.1)
+            time.sleep(0.4)
+            await asyncio.sleep(0.1)
+        finally:
+            await detector.stop()
+
+        stalls = detector.recent_stalls()
+        assert len(stalls) == 1
+        assert "test_detects_blocking_callback" in stalls[0]["stack"]
+        assert stalls[0]["blocked_ms"] >= 350
+
+    async def test_no_stall_when_loop_is_free(self):
+        """Test an idle loop reports no stalls."""
+        detector = LoopBlockingDetector(threshold_ms=100)
+        detector.start()
+        await asyncio.sleep(0.3)
+        await detector.stop()
+
+        assert detector.recent_stalls() == []
+
+    def test_sampling_profile_is_folded(self):
+        """Test samples are returned as folded stacks with counts."""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_worker, args=(stop,), name="busy")
+        worker.start()
+        try:
+            output = SamplingProfiler().profile(seconds=0.2, interval_ms=5)
+        finally:
+            stop.set()
+            worker.join()
+
+        busy_lines = [line for line in output.splitlines() if line.startswith("busy;")]
+        assert busy_lines
+        stack, count = busy_lines[0].rsplit(" ", 1)
+        assert "busy_worker" in stack
+        assert int(count) > 0
+
+
+@pytest.mark.integration
+class TestAdminEndpoints:
+    """Test admin endpoint authentication and responses."""
+
+    def test_disabled_without_token(self, client, mocker):
+        """Test admin endpoints are hidden when no token is configured."""
+        mocker.patch.object(settings, "admin_token", "")
+
+        assert client.get("/admin/stalls").status_code == 404
+
+    def test_requires_token(self, client, mocker):
+        """Test a wrong or missing token is rejected."""
+        mocker.patch.object(settings, "admin_token", "s3cret")
+
+        assert client.get("/admin/stalls").status_code == 403
+        wrong = client.get("/admin/stalls", headers={"Authorization": "Bearer nope"})
+        assert wrong.status_code == 403
+
+    def test_profile(self, client, mocker):
+        """Test the profile endpoint returns a flamegraph-compatible dump."""
+        mocker.patch.object(settings, "admin_token", "s3cret")
+
+        response = client.get(
+            "/admin/profile",
+            params={"seconds": 0.1, "interval_ms": 5},
+            headers={"Authorization": "Bearer s3cret"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+
+    def test_stalls(self, client, mocker):
+        """Test the stall report is returned."""
+        mocker.patch.object(settings, "admin_token", "s3cret")
+
+        response = client.get("/admin/stalls", headers={"Authorization": "Bearer s3cret"})
+
+        assert response.status_code == 200
+        assert response.json()["stalls"] == []
@@ -0,0 +1,218 @@
+"""Tests for the recipe library."""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services import minhash
+from app.services.recipes import (
+    is_library_query,
+    parse_library_query,
+    parse_recipe_text,
+)
+
+CARBONARA = """**Spaghetti Carbonara**
+Prep time: 10 min
+Cook time: 15 min
+- 200g spaghetti
+- 2 eggs
+- 100g pancetta
+- 50g parmesan
+1. Cook the pasta.
+2. Mix eggs and parmesan, toss with pasta and pancetta."""
+
+PESTO = """Vegetarian Pesto Pasta
+Total time: 20 min
+- 250g penne
+- 3 tbsp basil pesto
+- 30g pine nuts
+1. Cook the penne and stir in the pesto."""
+
+CURRY = """Chickpea Curry
+Prep: 40 min
+- 1 can chickpeas
+- 400ml coconut milk
+- 1 onion
+Vegan and gluten-free."""
+
+CHICKEN_CURRY = """Chicken Curry
+- 500g chicken thighs
+- 400ml coconut milk
+- 2 tbsp curry paste"""
+
+
+@pytest.mark.unit
+class TestRecipeParsing:
+    """Test recipe text and query parsing."""
+
+    def test_parse_recipe_text(self):
+        """Test title, ingredients and prep time are extracted."""
+        recipe = parse_recipe_text(CARBONARA)
+
+        assert recipe.title == "Spaghetti Carbonara"
+        assert recipe.ingredients == ["spaghetti", "eggs", "pancetta", "parmesan"]
+        assert recipe.prep_minutes == 25
+
+    def test_parse_recipe_diets(self):
+        """Test diet tags are detected, vegan implying vegetarian."""
+        assert parse_recipe_text(CURRY).diets == ["gluten_free", "vegan", "vegetarian"]
+        assert parse_recipe_text(PESTO).prep_minutes == 20
+
+    def test_library_query(self):
+        """Test library requests and their filters are recognized."""
+        assert is_library_query("show my pasta recipes")
+        assert is_library_query("montre mes recettes de pâtes")
+        assert not is_library_query("give me a pasta recipe")
+        assert not is_library_query("Plan my week using my saved recipes")
+        assert not is_library_query("Plan my meals for the week with my recipes")
+        assert not is_library_query("Can you make my lasagna recipe vegan?")
+
+        query = parse_library_query("my quick vegetarian recipes with pesto")
+        assert query.diet == "vegetarian"
+        assert query.ingredients == ["pesto"]
+        assert query.max_prep_minutes == 30
+        assert query.terms == []
+
+    def test_minhash_similarity(self):
+        """Test near-identical texts have similar signatures."""
+        edited = CARBONARA.replace("Cook the pasta.", "Cook the pasta al dente.")
+
+        assert minhash.similarity(minhash.signature(CARBONARA), minhash.signature(edited)) > 0.7
+        assert minhash.similarity(minhash.signature(CARBONARA), minhash.signature(CURRY)) < 0.2
+
+
+@pytest.mark.unit
+class TestRecipeLibrary:
+    """Test suite for RecipeLibrary."""
+
+    def test_save_and_search(self, recipe_library):
+        """Test full-text search is scoped to the user."""
+        for text in (CARBONARA, PESTO, CURRY):
+            recipe_library.save("331", parse_recipe_text(text))
+        recipe_library.save("332", parse_recipe_text(CARBONARA))
+
+        results = recipe_library.search("331", parse_library_query("show my pasta recipes"))
+
+        assert {recipe.title for recipe in results} == {"Spaghetti Carbonara", "Vegetarian Pesto Pasta"}
+
+    def test_attribute_filters(self, recipe_library):
+        """Test diet, ingredient and prep-time filters use the attribute indexes."""
+        for text in (CARBONARA, PESTO, CURRY):
+            recipe_library.save("331", parse_recipe_text(text))
+
+        vegan = recipe_library.search("331", parse_library_query("my vegan recipes"))
+        with_eggs = recipe_library.search("331", parse_library_query("my recipes with egg"))
+        quick = recipe_library.search("331", parse_library_query("my recipes under 30 min"))
+
+        assert [recipe.title for recipe in vegan] == ["Chickpea Curry"]
+        assert [recipe.title for recipe in with_eggs] == ["Spaghetti Carbonara"]
+        assert {recipe.title for recipe in quick} == {"Spaghetti Carbonara", "Vegetarian Pesto Pasta"}
+
+    def test_near_duplicates_are_not_stored(self, recipe_library):
+        """Test a lightly edited recipe is recognized as a duplicate."""
+        first, created = recipe_library.save("331", parse_recipe_text(CARBONARA))
+        edited = CARBONARA.replace("2 eggs", "3 eggs")
+        second, created_again = recipe_library.save("331", parse_recipe_text(edited))
+
+        assert created
+        assert not created_again
+        assert second.id == first.id
+
+    def test_answer_from_library(self, recipe_library):
+        """Test save commands, browsing and known recipes skip the LLM."""
+        assert "Saved" in recipe_library.answer("331", f"save recipe: {CARBONARA}")
+        assert "already" in recipe_library.answer("331", f"save recipe: {CARBONARA}")
+        assert recipe_library.answer("331", "show my curry recipes") is None
+        assert recipe_library.answer("331", "Recipe for spaghetti carbonara?") == CARBONARA
+        assert recipe_library.answer("331", "Recipe for lasagna?") is None
+
+    def test_generated_recipes_are_cache_only(self, recipe_library):
+        """Test generated recipes are served again but never listed as the user's own."""
+        recipe_library.save_generated("331", CURRY)
+
+        assert recipe_library.answer("331", "show my curry recipes") is None
+        assert recipe_library.grounding_context("331", "Something with chickpeas?") == ""
+        assert recipe_library.answer("331", "Recipe for chickpea curry?") == CURRY
+
+        assert "Saved" in recipe_library.answer("331", f"save recipe: {CURRY}")
+        assert recipe_library.answer("331", "show my curry recipes") == CURRY
+
+    def test_generated_recipe_only_serves_its_exact_title(self, recipe_library):
+        """Test a cached recipe is not served for a request asking for something else."""
+        recipe_library.save_generated("331", CHICKEN_CURRY)
+
+        assert recipe_library.answer("331", "Recipe for chicken curry?") == CHICKEN_CURRY
+        assert recipe_library.answer("331", "Can you give me a chicken curry recipe?") == CHICKEN_CURRY
+        assert recipe_library.answer("331", "Recipe for chicken curry without coconut milk") is None
+        assert recipe_library.answer("331", "Give me a vegan recipe for chicken curry") is None
+        assert recipe_library.answer("331", "Quick recipe for chicken curry") is None
+        assert recipe_library.answer("331", "Recipe for chicken curry with rice") is None
+
+    def test_saved_recipe_respects_filters(self, recipe_library):
+        """Test a saved recipe is not served when it fails the request's diet filter."""
+        recipe_library.save("331", parse_recipe_text(CHICKEN_CURRY))
+
+        assert recipe_library.answer("331", "Recipe for chicken curry?") == CHICKEN_CURRY
+        assert recipe_library.answer("331", "Give me a vegan recipe for chicken curry") is None
+
+    def test_grounding_context(self, recipe_library):
+        """Test relevant saved recipes are summarized compactly."""
+        recipe_library.save("331", parse_recipe_text(PESTO))
+
+        context = recipe_library.grounding_context("331", "Something with pesto for dinner?")
+
+        assert context == "- Vegetarian Pesto Pasta, 20 min: penne, basil pesto, pine nuts"
+        assert recipe_library.grounding_context("331", "Hello!") == ""
+
+
+@pytest.mark.integration
+class TestRecipeWebhook:
+    """Test recipe library use from the webhook."""
+
+    def test_library_query_skips_llm(self, client, sample_whatsapp_text_message, recipe_library, mocker):
+        """Test "show my ... recipes" is answered from the library."""
+        recipe_library.save("33612345678", parse_recipe_text(PESTO))
+        message = sample_whatsapp_text_message["entry"][0]["changes"][0]["value"]["messages"][0]
+        message["text"]["body"] = "show my pasta recipes"
+        mock_llm = AsyncMock()
+        mocker.patch("app.api.webhook.llm_service.generate_meal_plan_response", mock_llm)
+        mock_send = AsyncMock()
+        mocker.patch("app.api.webhook.send_text_message", mock_send)
+
+        response = client.post("/webhook", json=sample_whatsapp_text_message)
+
+        assert response.status_code == 200
+        mock_llm.assert_not_called()
+        mock_send.assert_called_once_with("33612345678", PESTO)
+
+    def test_generated_recipe_is_saved(self, client, sample_whatsapp_text_message, recipe_library, mocker):
+        """Test LLM-generated recipes are cached for the next request."""
+        message = sample_whatsapp_text_message["entry"][0]["changes"][0]["value"]["messages"][0]
+        message["text"]["body"] = "Can you give me a chickpea curry recipe?"
+        mocker.patch(
+            "app.api.webhook.llm_service.generate_meal_plan_response", AsyncMock(return_value=CURRY)
+        )
+        mocker.patch("app.api.webhook.send_text_message", AsyncMock())
+
+        client.post("/webhook", json=sample_whatsapp_text_message)
+
+        saved = recipe_library.search(
+            "33612345678", parse_library_query("my curry recipes"), include_generated=True
+        )
+        assert [recipe.source for recipe in saved] == ["generated"]
+
+    def test_request_mentioning_my_recipes_uses_llm(
+        self, client, sample_whatsapp_text_message, recipe_library, mocker
+    ):
+        """Test a request about a saved recipe goes to the LLM, grounded in that recipe."""
+        recipe_library.save("33612345678", parse_recipe_text(PESTO))
+        message = sample_whatsapp_text_message["entry"][0]["changes"][0]["value"]["messages"][0]
+        message["text"]["body"] = "Can you make my pesto pasta recipe vegan?"
+        mock_llm = AsyncMock(return_value="Swap the parmesan for nutritional yeast.")
+        mocker.patch("app.api.webhook.llm_service.generate_meal_plan_response", mock_llm)
+        mock_send = AsyncMock()
+        mocker.patch("app.api.webhook.send_text_message", mock_send)
+
+        client.post("/webhook", json=sample_whatsapp_text_message)
+
+        assert "Vegetarian Pesto Pasta" in mock_llm.call_args.kwargs["context"]
+        mock_send.assert_called_once_with("33612345678", "Swap the parmesan for nutritional yeast.")
@@ -0,0 +1,196 @@
+"""Tests for sender-affinity sharding."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+from fastapi import BackgroundTasks
+
+from app.api.webhook import receive_forwarded_webhook
+from app.core.constants import SHARD_INTERNAL_WEBHOOK_PATH, SHARD_SECRET_HEADER
+from app.services.sharding import ConsistentHashRing, ShardRouter, parse_members, shard_router
+
+MEMBERS = {"w0": "unix:/tmp/w0.sock", "w1": "unix:/tmp/w1.sock", "w2": "http://10.0.0.2:8000"}
+SENDERS = [f"3361234{i:04d}" for i in range(1000)]
+
+
+@pytest.mark.unit
+class TestConsistentHashRing:
+    """Test suite for ConsistentHashRing."""
+
+    def test_parse_members(self):
+        """Test the membership spec is parsed into a mapping."""
+        assert parse_members("w0=unix:/tmp/w0.sock, w1=http://h:8000") == {
+            "w0": "unix:/tmp/w0.sock",
+            "w1": "http://h:8000",
+        }
+        assert parse_members("") == {}
+
+    def test_keys_spread_across_nodes(self):
+        """Test virtual nodes spread senders roughly evenly."""
+        ring = ConsistentHashRing(["w0", "w1", "w2"])
+        counts = {"w0": 0, "w1": 0, "w2": 0}
+        for sender in SENDERS:
+            counts[ring.owner(sender)] += 1
+
+        assert all(count > 200 for count in counts.values())
+
+    def test_removing_node_only_moves_its_keys(self):
+        """Test a membership change only reassigns the departed node's senders."""
+        ring = ConsistentHashRing(["w0", "w1", "w2"])
+        before = {sender: ring.owner(sender) for sender in SENDERS}
+        ring.rebuild(["w0", "w1"])
+
+        for sender in SENDERS:
+            if before[sender] != "w2":
+                assert ring.owner(sender) == before[sender]
+
+
+@pytest.mark.unit
+class TestShardRouter:
+    """Test suite for ShardRouter."""
+
+    def test_disabled_without_members(self):
+        """Test every sender is local when sharding is not configured."""
+        router = ShardRouter(node_id="", members={}, secret="")
+
+        assert not router.enabled
+        assert router.is_local("33612345678")
+
+    async def test_route_forwards_remote_sender(self, mocker):
+        """Test messages owned by a peer are forwarded with metadata and secret."""
+        router = ShardRouter(node_id="w0", members=MEMBERS, secret="s3cret")
+        sender = next(s for s in SENDERS if router.owner(s) == "w1")
+
+        client = MagicMock()
+        client.post = AsyncMock(return_value=MagicMock(raise_for_status=MagicMock()))
+        mocker.patch.object(router, "_client", return_value=client)
+
+        value = {"metadata": {"phone_number_id": "123"}, "messages": [{"from": sender}]}
+        forwarded = await router.route({"from": sender, "id": "m1"}, value)
+
+        assert forwarded
+        kwargs = client.post.call_args.kwargs
+        assert client.post.call_args[0][0] == SHARD_INTERNAL_WEBHOOK_PATH
+        assert kwargs["headers"] == {SHARD_SECRET_HEADER: "s3cret"}
+        forwarded_value = kwargs["json"]["entry"][0]["changes"][0]["value"]
+        assert forwarded_value["metadata"] == {"phone_number_id": "123"}
+        assert forwarded_value["messages"] == [{"from": sender, "id": "m1"}]
+
+    async def test_failed_forward_rebalances(self, mocker):
+        """Test an unreachable peer is dropped and its senders handled locally."""
+        router = ShardRouter(node_id="w0", members=MEMBERS, secret="s3cret")
+        sender = next(s for s in SENDERS if router.owner(s) == "w1")
+
+        client = MagicMock()
+        client.post = AsyncMock(side_effect=httpx.ConnectError("refused"))
+        mocker.patch.object(router, "_client", return_value=client)
+
+        assert not await router.route({"from": sender}, {"messages": []})
+        assert "w1" not in router.alive
+        assert router.owner(sender) != "w1"
+
+    async def test_forward_timeout_after_accept_keeps_owner(self, mocker):
+        """Test a read timeout is not treated as a failed hand-off."""
+        router = ShardRouter(node_id="w0", members=MEMBERS, secret="s3cret")
+        sender = next(s for s in SENDERS if router.owner(s) == "w1")
+
+        client = MagicMock()
+        client.post = AsyncMock(side_effect=httpx.ReadTimeout("timed out"))
+        mocker.patch.object(router, "_client", return_value=client)
+
+        assert await router.route({"from": sender}, {"messages": []})
+        assert "w1" in router.alive
+        assert router.owner(sender) == "w1"
+
+    async def test_rejected_forward_keeps_owner_in_ring(self, mocker):
+        """Test an owner answering with an error is handled locally but not dropped."""
+        router = ShardRouter(node_id="w0", members=MEMBERS, secret="s3cret")
+        sender = next(s for s in SENDERS if router.owner(s) == "w1")
+
+        request = httpx.Request("POST", "http://shard" + SHARD_INTERNAL_WEBHOOK_PATH)
+        response = httpx.Response(503, request=request)
+        client = MagicMock()
+        client.post = AsyncMock(return_value=response)
+        mocker.patch.object(router, "_client", return_value=client)
+
+        assert not await router.route({"from": sender}, {"messages": []})
+        assert "w1" in router.alive
+
+    def test_check_secret(self):
+        """Test forwarded requests need the configured secret."""
+        router = ShardRouter(node_id="w0", members=MEMBERS, secret="s3cret")
+
+        assert router.check_secret("s3cret")
+        assert not router.check_secret("wrong")
+        assert not router.check_secret("sécret")
+        assert not router.check_secret(None)
+        assert not ShardRouter(node_id="w0", members=MEMBERS, secret="").check_secret("")
+
+    async def test_sender_lock_keeps_order(self):
+        """Test one sender's messages are processed one at a time, in order."""
+        router = ShardRouter(node_id="", members={}, secret="")
+        order = []
+
+        async def handle(index):
+            async with router.sender_lock("331"):
+                order.append(f"start{index}")
+                await asyncio.sleep(0)
+                order.append(f"end{index}")
+
+        await asyncio.gather(handle(1), handle(2))
+
+        assert order == ["start1", "end1", "start2", "end2"]
+        assert router._locks == {}
+
+
+@pytest.mark.integration
+class TestShardWebhook:
+    """Test webhook routing between shards."""
+
+    def test_forwarded_message_not_processed_locally(self, client, sample_whatsapp_text_message, mocker):
+        """Test messages handed to another shard are not handled here."""
+        mocker.patch("app.api.webhook.shard_router.route", AsyncMock(return_value=True))
+        mock_handle = AsyncMock()
+        mocker.patch("app.api.webhook.handle_incoming_message", mock_handle)
+
+        response = client.post("/webhook", json=sample_whatsapp_text_message)
+
+        assert response.status_code == 200
+        mock_handle.assert_not_called()
+
+    def test_internal_webhook_requires_secret(self, client, sample_whatsapp_text_message, mocker):
+        """Test forwarded messages are only accepted with the shared secret."""
+        mocker.patch.object(shard_router, "secret", "s3cret")
+        mock_handle = AsyncMock()
+        mocker.patch("app.api.webhook.handle_incoming_message", mock_handle)
+
+        denied = client.post(SHARD_INTERNAL_WEBHOOK_PATH, json=sample_whatsapp_text_message)
+        accepted = client.post(
+            SHARD_INTERNAL_WEBHOOK_PATH,
+            json=sample_whatsapp_text_message,
+            headers={SHARD_SECRET_HEADER: "s3cret"},
+        )
+
+        assert denied.status_code == 403
+        assert accepted.status_code == 200
+        mock_handle.assert_called_once()
+
+    async def test_forwarded_message_acknowledged_before_processing(
+        self, sample_whatsapp_text_message, mocker
+    ):
+        """Test the owner answers the forward before doing the work."""
+        mocker.patch.object(shard_router, "secret", "s3cret")
+        mock_process = AsyncMock()
+        mocker.patch("app.api.webhook.process_webhook_body", mock_process)
+        request = MagicMock()
+        request.json = AsyncMock(return_value=sample_whatsapp_text_message)
+        background_tasks = BackgroundTasks()
+
+        response = await receive_forwarded_webhook(request, background_tasks, "s3cret")
+
+        assert response == {"status": "ok"}
+        mock_process.assert_not_called()
+        await background_tasks()
+        mock_process.assert_called_once_with(sample_whatsapp_text_message, False)
@@ -0,0 +1,170 @@
+"""Unit tests for structured, streamed meal plans."""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.constants import DAYS_OF_WEEK
+from app.models.llm import LLMCompletion
+from app.services.load import load_monitor
+from app.services.scheduler import llm_scheduler
+from app.services.structured_plan import (
+    IncrementalDayParser,
+    meal_plan_response_format,
+    parse_day,
+)
+
+
+def day_json(day, lunch="Salad", dinner="Pasta"):
+    """JSON text of one day object."""
+    return json.dumps({"day": day, "lunch": lunch, "dinner": dinner})
+
+
+def plan_json(days):
+    """JSON text of a plan with the given days."""
+    return '{"days": [' + ", ".join(day_json(day) for day in days) + "]}"
+
+
+@pytest.mark.unit
+class TestIncrementalDayParser:
+    """Test extraction of completed days from streamed JSON."""
+
+    def test_days_emitted_across_chunk_boundaries(self):
+        """Test each day is returned by the chunk that closes it."""
+        text = plan_json(["monday", "tuesday"])
+        parser = IncrementalDayParser()
+
+        completed = [parser.feed(text[i:i + 7]) for i in range(0, len(text), 7)]
+
+        days = [json.loads(raw)["day"] for chunk in completed for raw in chunk]
+        assert days == ["monday", "tuesday"]
+        assert sum(1 for chunk in completed if chunk) == 2
+
+    def test_braces_and_quotes_inside_strings(self):
+        """Test braces and escaped quotes in dish names do not confuse the parser."""
+        raw = json.dumps({"day": "monday", "lunch": 'Tacos {al "pastor"}', "dinner": "Soup ]"})
+        parser = IncrementalDayParser()
+
+        completed = parser.feed("```json\n[" + raw + "]\n```")
+
+        assert completed == [raw]
+
+    def test_response_format_restricts_days(self):
+        """Test the schema only allows the requested days."""
+        response_format = meal_plan_response_format(["monday"])
+        schema = response_format["json_schema"]["schema"]
+
+        assert response_format["type"] == "json_schema"
+        assert schema["properties"]["days"]["items"]["properties"]["day"]["enum"] == ["monday"]
+
+
+@pytest.mark.unit
+class TestParseDay:
+    """Test day validation and repair."""
+
+    def test_trailing_comma_repaired(self):
+        """Test a trailing comma does not discard the day."""
+        day = parse_day('{"day": "Monday", "lunch": "Salad", "dinner": "Pasta",}', DAYS_OF_WEEK)
+
+        assert day is not None
+        assert day.day == "monday"
+        assert day.meals == {"lunch": "Salad", "dinner": "Pasta"}
+
+    def test_invalid_days_rejected(self):
+        """Test missing meals, unknown days and duplicates are rejected."""
+        assert parse_day('{"day": "monday", "lunch": "Salad", "dinner": ""}', DAYS_OF_WEEK) is None
+        assert parse_day(day_json("funday"), DAYS_OF_WEEK) is None
+        assert parse_day(day_json("monday"), ["tuesday"]) is None
+        assert parse_day('{"day": "monday", "lunch": ', DAYS_OF_WEEK) is None
+
+
+@pytest.mark.unit
+class TestStreamMealPlan:
+    """Test OpenRouterService.stream_meal_plan."""
+
+    async def test_days_streamed_and_missing_days_repaired(self, llm_service):
+        """Test valid days stream out and only the broken ones are regenerated."""
+        broken = '{"days": [' + day_json("monday") + ', {"day": "tuesday", "lunch": ""}, ' + day_json("wednesday")
+
+        async def stream_completion(*args, **kwargs):
+            for i in range(0, len(broken), 10):
+                yield broken[i:i + 10]
+
+        llm_service.stream_completion = MagicMock(side_effect=stream_completion)
+        llm_service.complete = AsyncMock(
+            return_value=LLMCompletion(content=plan_json(["tuesday", "thursday"]))
+        )
+
+        days = [
+            day.day
+            async for day in llm_service.stream_meal_plan(
+                "Plan my week", days=["monday", "tuesday", "wednesday", "thursday"]
+            )
+        ]
+
+        assert days == ["monday", "wednesday", "tuesday", "thursday"]
+        repair_kwargs = llm_service.complete.call_args.kwargs
+        schema = repair_kwargs["response_format"]["json_schema"]["schema"]
+        assert schema["properties"]["days"]["items"]["properties"]["day"]["enum"] == [
+            "tuesday",
+            "thursday",
+        ]
+        assert "tuesday, thursday" in llm_service.complete.call_args.args[0][-1]["content"]
+
+    async def test_complete_plan_needs_no_repair(self, llm_service):
+        """Test a well-formed stream makes a single request."""
+        text = plan_json(["monday", "tuesday"])
+
+        async def stream_completion(*args, **kwargs):
+            yield text
+
+        llm_service.stream_completion = MagicMock(side_effect=stream_completion)
+        llm_service.complete = AsyncMock()
+
+        days = [
+            day async for day in llm_service.stream_meal_plan("Plan", days=["monday", "tuesday"])
+        ]
+
+        assert [day.day for day in days] == ["monday", "tuesday"]
+        llm_service.complete.assert_not_called()
+        assert llm_service.stream_completion.call_args.kwargs["response_format"] is not None
+
+    async def test_stream_completion_parses_sse(self, llm_service, mocker):
+        """Test server-sent events are turned into content deltas."""
+        lines = [
+            ": OPENROUTER PROCESSING",
+            'data: {"choices": [{"delta": {"content": "Hel"}}]}',
+            "",
+            'data: {"choices": [{"delta": {"content": "lo"}, "finish_reason": "stop"}]}',
+            "data: [DONE]",
+        ]
+
+        async def aiter_lines():
+            for line in lines:
+                yield line
+
+        response = MagicMock()
+        response.aiter_lines = aiter_lines
+        stream = MagicMock()
+        stream.__aenter__ = AsyncMock(return_value=response)
+        stream.__aexit__ = AsyncMock(return_value=None)
+        client = MagicMock()
+        client.stream.return_value = stream
+        client.__aenter__ = AsyncMock(return_value=client)
+        client.__aexit__ = AsyncMock(return_value=None)
+        mocker.patch("httpx.AsyncClient", return_value=client)
+
+        chunks = [chunk async for chunk in llm_service.stream_completion([])]
+
+        assert chunks == ["Hel", "lo"]
+        assert client.stream.call_args.kwargs["json"]["stream"] is True
+
+        # The LLM slot is released once the stream ends, not when the consumer is done
+        stream = llm_service.stream_completion([])
+        assert await anext(stream) == "Hel"
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert llm_scheduler.active == 0
+        assert load_monitor.in_flight_llm == 0
+        assert [chunk async for chunk in stream] == ["lo"]
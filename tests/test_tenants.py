@@ -0,0 +1,151 @@
+"""Tests for multi-number tenancy and fair LLM scheduling."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.config import TenantConfig
+from app.services.scheduler import FairScheduler
+from app.services.tenants import TenantRegistry, TokenBucket, current_tenant
+
+
+def make_registry():
+    """Registry with a default number and a second, heavier one."""
+    return TenantRegistry(
+        [
+            TenantConfig(phone_number_id="111", access_token="token-a"),
+            TenantConfig(phone_number_id="222", access_token="token-b", weight=2.0),
+        ],
+        default_id="111",
+    )
+
+
+@pytest.mark.unit
+class TestTenantRegistry:
+    """Test tenant resolution and budgets."""
+
+    def test_resolve_by_phone_number_id(self):
+        """Test values resolve to their number, unknown or missing ones to the default."""
+        registry = make_registry()
+
+        assert registry.resolve({"metadata": {"phone_number_id": "222"}}).key == "222"
+        assert registry.resolve({"metadata": {"phone_number_id": "999"}}).key == "111"
+        assert registry.resolve({}).key == "111"
+
+    def test_current_tenant_defaults(self):
+        """Test the context tenant is used when set."""
+        registry = make_registry()
+        assert registry.current().key == "111"
+
+        token = current_tenant.set(registry.tenants["222"])
+        try:
+            assert registry.current().key == "222"
+        finally:
+            current_tenant.reset(token)
+
+    async def test_client_authenticates_as_tenant(self):
+        """Test each tenant gets its own pool with its own credentials."""
+        registry = make_registry()
+        client = registry.tenants["222"].client
+
+        assert client is registry.tenants["222"].client
+        assert client is not registry.tenants["111"].client
+        assert client.headers["Authorization"] == "Bearer token-b"
+        assert str(client.base_url).endswith("/222/")
+        await registry.close()
+
+    async def test_token_bucket_waits_when_spent(self, mocker):
+        """Test acquiring past the burst sleeps for the next token."""
+        bucket = TokenBucket(rate=10.0, capacity=1.0)
+        sleep = mocker.patch("app.services.tenants.asyncio.sleep", AsyncMock())
+
+        await bucket.acquire()
+        sleep.assert_not_called()
+
+        bucket._updated -= 0.05
+        await bucket.acquire()
+        sleep.assert_called()
+
+
+@pytest.mark.unit
+class TestFairScheduler:
+    """Test weighted fair queuing."""
+
+    async def run_queued(self, scheduler, requests):
+        """Queue requests behind a held slot and return the order they run in."""
+        order = []
+
+        async def request(tenant, weight, label):
+            async with scheduler.slot(tenant, weight):
+                order.append(label)
+
+        async with scheduler.slot("blocker"):
+            tasks = [asyncio.create_task(request(*item)) for item in requests]
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order
+
+    async def test_noisy_tenant_does_not_starve_others(self):
+        """Test a late request from a quiet tenant overtakes a noisy backlog."""
+        scheduler = FairScheduler(concurrency=1)
+        requests = [("noisy", 1.0, f"noisy-{i}") for i in range(4)] + [("quiet", 1.0, "quiet")]
+
+        order = await self.run_queued(scheduler, requests)
+
+        assert order.index("quiet") <= 1
+        assert scheduler.active == 0
+
+    async def test_weights_share_slots(self):
+        """Test a tenant with twice the weight runs twice as often."""
+        scheduler = FairScheduler(concurrency=1)
+        requests = [("a", 1.0, "a")] * 4 + [("b", 2.0, "b")] * 4
+
+        order = await self.run_queued(scheduler, requests)
+
+        assert order[:3].count("b") == 2
+
+    async def test_cancelled_waiter_releases_nothing(self):
+        """Test cancelling a queued request keeps the slot count consistent."""
+        scheduler = FairScheduler(concurrency=1)
+
+        async def waiter():
+            async with scheduler.slot("a"):
+                pass
+
+        async with scheduler.slot("b"):
+            task = asyncio.create_task(waiter())
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        assert scheduler.active == 0
+        assert scheduler.waiting == 0
+
+
+@pytest.mark.integration
+class TestTenantRouting:
+    """Test webhook messages are answered from the number they were sent to."""
+
+    def test_reply_sent_from_receiving_number(self, client, sample_whatsapp_text_message, mocker):
+        """Test the reply goes through the receiving tenant's client."""
+        registry = make_registry()
+        tenant_clients = {}
+        for key, tenant in registry.tenants.items():
+            tenant._client = MagicMock()
+            tenant._client.post = AsyncMock(return_value=MagicMock())
+            tenant_clients[key] = tenant._client
+        mocker.patch("app.api.webhook.tenant_registry", registry)
+        mocker.patch(
+            "app.api.webhook.llm_service.generate_meal_plan_response",
+            AsyncMock(return_value="Hello"),
+        )
+        value = sample_whatsapp_text_message["entry"][0]["changes"][0]["value"]
+        value["metadata"] = {"phone_number_id": "222"}
+
+        response = client.post("/webhook", json=sample_whatsapp_text_message)
+
+        assert response.status_code == 200
+        tenant_clients["111"].post.assert_not_called()
+        tenant_clients["222"].post.assert_called_once()
+        assert tenant_clients["222"].post.call_args.kwargs["json"]["text"]["body"] == "Hello"
@@ -4,6 +4,9 @@ import pytest
 from unittest.mock import AsyncMock
 
 from app.core.config import settings
+from app.core.constants import DAYS_OF_WEEK
+from app.models.meal_plan import DayPlan, MealPlan
+from app.services.plan_store import plan_week_start
 
 
 @pytest.mark.integration
@@ -64,9 +67,51 @@ class TestWebhookMessages:
 
         assert response.status_code == 200
         assert response.json() == {"status": "ok"}
-        mock_llm.assert_called_once_with("Test message")
+        mock_llm.assert_called_once_with("Test message", context="")
         mock_send.assert_called_once_with("33612345678", "AI response")
 
+    def test_preferences_command(self, client, sample_whatsapp_text_message, plan_store, mocker):
+        """Test preference commands are stored without calling the LLM."""
+        message = sample_whatsapp_text_message["entry"][0]["changes"][0]["value"]["messages"][0]
+        message["text"]["body"] = "Preferences: vegetarian, no mushrooms"
+        mock_llm = AsyncMock()
+        mocker.patch("app.api.webhook.llm_service.generate_meal_plan_response", mock_llm)
+        mock_send = AsyncMock()
+        mocker.patch("app.api.webhook.send_text_message", mock_send)
+
+        response = client.post("/webhook", json=sample_whatsapp_text_message)
+
+        assert response.status_code == 200
+        mock_llm.assert_not_called()
+        assert plan_store.get_preferences("33612345678") == "vegetarian, no mushrooms"
+
+    def test_weekly_plan_served_from_precompute(
+        self, client, sample_whatsapp_text_message, plan_store, mocker
+    ):
+        """Test weekly plan requests are served from the precomputed store."""
+        message = sample_whatsapp_text_message["entry"][0]["changes"][0]["value"]["messages"][0]
+        message["text"]["body"] = "Plan my meals for the week"
+        plan = MealPlan(
+            days=[DayPlan(day=day, meals={"lunch": "Salad", "dinner": "Soup"}) for day in DAYS_OF_WEEK]
+        )
+        plan_store.touch("33612345678")
+        plan_store.save_plan(
+            "33612345678",
+            plan_week_start(),
+            plan_store.current_preferences_hash("33612345678"),
+            plan.model_dump_json(),
+        )
+        mock_llm = AsyncMock()
+        mocker.patch("app.api.webhook.llm_service.generate_meal_plan_response", mock_llm)
+        mock_send = AsyncMock()
+        mocker.patch("app.api.webhook.send_text_message", mock_send)
+
+        response = client.post("/webhook", json=sample_whatsapp_text_message)
+
+        assert response.status_code == 200
+        mock_llm.assert_not_called()
+        mock_send.assert_called_once_with("33612345678", plan.to_text())
+
     def test_image_message(self, client, sample_whatsapp_image_message, mocker):
         """Test receiving image message."""
         mock_send = AsyncMock()